@@ -0,0 +1,207 @@
+"""Benchmark + teste de equivalência de classificacao.categoria_de_ementa: ementas/s antes e
+depois do motor com pré-filtro por literais (RegrasOrdenadas), sobre um corpus sintético grande.
+
+"Antes" é a versão anterior, reproduzida aqui: cada padrão de CATEGORIA_PATTERNS compilado
+com IGNORECASE e testado em ordem, depois o laço de substrings de DESTINATARIO_CATEGORIA. O
+script sai com erro se alguma ementa do corpus tiver categoria diferente nas duas versões.
+
+O corpus mistura as ementas do Siscam sintético, frases montadas com os termos de cada regra
+(também com acento, maiúsculas e colados a outras letras - o caso em que o pré-filtro passa
+mas o regex não casa), pedidos "Destinatário - solicita-se" e texto sem categoria.
+
+Também confere classificar_lote (o caminho comum de export_json, gerar_resumos e dashboard)
+coluna a coluna - família, status e categoria - contra as versões anteriores, com tipos e
+situações sorteados (inclusive vazios e NaN do pandas), e mede as propostas/s dele.
+
+Uso (da raiz do repositório):
+    python -m benchmarks.bench_classificador                          # 50 mil ementas sintéticas
+    python -m benchmarks.bench_classificador --banco data/camara_botucatu.db   # + ementas reais
+"""
+
+import argparse
+import math
+import random
+import re
+import sqlite3
+import time
+from typing import List
+
+import pandas as pd
+
+from src.classificacao import (
+    _DESTINATARIO_PREFIXO_RE, _literais_obrigatorios, _normalizar_texto, categoria_de_ementa, classificar_lote,
+)
+from src.config import CATEGORIA_PATTERNS, CATEGORIA_RESIDUAL, DESTINATARIO_CATEGORIA, FAMILIA_POR_TIPO
+
+from .siscam_sintetico import EMENTAS
+
+_CATEGORIA_COMPILADAS = [(nome, re.compile(padrao, re.IGNORECASE)) for nome, padrao in CATEGORIA_PATTERNS]
+
+ABERTURAS = ["Indica ao Executivo", "Requer informações sobre", "Solicita", "Dispõe sobre",
+             "Autoriza o Poder Executivo a", "Voto de", "Institui", "Altera dispositivos sobre"]
+PREENCHIMENTO = ["a Rua {n}", "o bairro Jardim {n}", "o processo {n}/2025", "a Vila {n}", "o contrato",
+                 "conforme especifica", "e dá outras providências", "com urgência", "no município"]
+# frases que casam regras inteiras (os literais sozinhos nem sempre bastam: "utilidade" x
+# "utilidade\s+pública")
+FRASES = ["declara de utilidade pública a Associação", "concede título de cidadão botucatuense",
+          "dá o nome de", "passa a denominar", "institui o Dia Municipal do Ciclista", "institui a campanha",
+          "data comemorativa", "voto de pesar pelo falecimento", "moção de apelo", "audiência pública",
+          "concurso público", "cesta básica", "obras de drenagem", "redutor de velocidade"]
+ACENTOS = str.maketrans("aeiouc", "áêíõúç")
+SITUACOES = ["APROVADO", "Aprovado em 1ª discussão", "INDEFERIDO", "Deferido", "Tramitando", "ENCAMINHADO",
+             "Arquivado", "RETIRADO PELO AUTOR", "Adiado", "REVOGADA", "Transformado em norma jurídica",
+             "Prejudicado", "Aguardando parecer", "", None, math.nan]
+
+
+def categoria_de_ementa_anterior(ementa):
+    if not ementa:
+        return CATEGORIA_RESIDUAL
+    texto_normalizado = _normalizar_texto(ementa)
+    for nome, padrao in _CATEGORIA_COMPILADAS:
+        if padrao.search(texto_normalizado):
+            return nome
+    m = _DESTINATARIO_PREFIXO_RE.match(ementa.strip())
+    if m:
+        destinatario = _normalizar_texto(m.group(1).strip())
+        for chave, categoria in DESTINATARIO_CATEGORIA.items():
+            if chave in destinatario:
+                return categoria
+    return CATEGORIA_RESIDUAL
+
+
+def status_de_situacao_anterior(situacao):
+    s = (situacao or "").upper()
+    if any(k in s for k in ["APROVADO", "DEFERIDO", "CONVERTIDO", "TRANSFORMADO"]):
+        return "Aprovado"
+    if any(k in s for k in ["REJEITADO", "INDEFERIDO", "PREJUDICADO"]):
+        return "Rejeitado"
+    if any(k in s for k in ["TRAMITANDO", "ENCAMINHA", "APRESENTADO"]):
+        return "Em tramitação"
+    if any(k in s for k in ["ARQUIVADO", "RETIRADO", "ADIADO", "REVOGADA"]):
+        return "Arquivado/Retirado"
+    return "Outra situação"
+
+
+def familia_de_tipo_anterior(tipo):
+    return FAMILIA_POR_TIPO.get(tipo, "Outros")
+
+
+def _sem_nan(valor):
+    return None if isinstance(valor, float) and math.isnan(valor) else valor
+
+
+def _variacao(rng: random.Random, termo: str) -> str:
+    sorteio = rng.random()
+    if sorteio < 0.15:
+        return termo.upper()
+    if sorteio < 0.3:
+        return termo.translate(ACENTOS)
+    if sorteio < 0.45:
+        return rng.choice("sxr") + termo + rng.choice("aeo")  # colado em outra palavra
+    return termo
+
+
+def corpus_sintetico(quantidade: int, semente: int = 7) -> List[str]:
+    rng = random.Random(semente)
+    termos = [literal for _, padrao in CATEGORIA_PATTERNS for literal in (_literais_obrigatorios(padrao)[0] or [])]
+    termos += FRASES
+    chaves = list(DESTINATARIO_CATEGORIA)
+    ementas: List[str] = [None, "", "   "]
+    while len(ementas) < quantidade:
+        sorteio = rng.random()
+        n = rng.randint(1, 999)
+        if sorteio < 0.1:
+            ementas.append(rng.choice(EMENTAS).format(n=n))
+        elif sorteio < 0.3:
+            destinatario = _variacao(rng, rng.choice(chaves)).title()
+            verbo = rng.choice(["solicita-se", "indica-se", "requer-se", "Solicita-se", "pede"])
+            ementas.append(f"{destinatario} - {verbo} {rng.choice(PREENCHIMENTO).format(n=n)}.")
+        elif sorteio < 0.4:
+            ementas.append(" ".join(rng.choice(PREENCHIMENTO) for _ in range(rng.randint(1, 4))).format(n=n))
+        else:
+            partes = [rng.choice(ABERTURAS)]
+            for _ in range(rng.randint(1, 3)):
+                partes.append(_variacao(rng, rng.choice(termos)))
+                partes.append(rng.choice(PREENCHIMENTO))
+            ementas.append(" ".join(partes).format(n=n))
+    return ementas
+
+
+def ementas_do_banco(caminho: str) -> List[str]:
+    with sqlite3.connect(caminho) as conn:
+        return [row[0] for row in conn.execute("SELECT ementa FROM proposituras")]
+
+
+def _ementas_por_segundo(funcao, ementas, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for ementa in ementas:
+            funcao(ementa)
+    return repeticoes * len(ementas) / (time.perf_counter() - inicio)
+
+
+def tipos_e_situacoes(quantidade: int, semente: int = 11):
+    rng = random.Random(semente)
+    tipos = list(FAMILIA_POR_TIPO) + ["Tipo desconhecido", "", None, math.nan]
+    return ([rng.choice(tipos) for _ in range(quantidade)], [rng.choice(SITUACOES) for _ in range(quantidade)])
+
+
+def _conferir_lote(tipos, situacoes, ementas):
+    """Sai com erro se classificar_lote divergir das versões anteriores em qualquer coluna."""
+    lote = classificar_lote(pd.Series(tipos, dtype=object), pd.Series(situacoes, dtype=object),
+                            pd.Series(ementas, dtype=object))
+    divergentes = []
+    linhas = lote[["familia", "status", "categoria"]].itertuples(index=False, name=None)
+    for tipo, situacao, ementa, obtido in zip(tipos, situacoes, ementas, linhas):
+        esperado = (familia_de_tipo_anterior(_sem_nan(tipo)), status_de_situacao_anterior(_sem_nan(situacao)),
+                    categoria_de_ementa_anterior(_sem_nan(ementa)))
+        if obtido != esperado:
+            divergentes.append((tipo, situacao, ementa, esperado, obtido))
+    if divergentes:
+        for tipo, situacao, ementa, esperado, obtido in divergentes[:10]:
+            print(f"  ({tipo!r}, {situacao!r}, {ementa!r}): antes {esperado}, em lote {obtido}")
+        raise SystemExit(f"ERRO: {len(divergentes)} proposituras com família/status/categoria diferente "
+                         f"em classificar_lote")
+
+
+def _ementas_por_segundo_lote(tipos, situacoes, ementas, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        classificar_lote(tipos, situacoes, ementas)
+    return repeticoes * len(ementas) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=50_000, help="Ementas sintéticas (default: 50 mil)")
+    parser.add_argument("--banco", help="Banco SQLite cujas ementas reais entram no corpus")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    ementas = corpus_sintetico(args.quantidade)
+    if args.banco:
+        ementas += ementas_do_banco(args.banco)
+
+    divergentes = [e for e in ementas if categoria_de_ementa_anterior(e) != categoria_de_ementa(e)]
+    if divergentes:
+        for ementa in divergentes[:10]:
+            print(f"  {ementa!r}: antes {categoria_de_ementa_anterior(ementa)!r}, "
+                  f"depois {categoria_de_ementa(ementa)!r}")
+        raise SystemExit(f"ERRO: {len(divergentes)} ementas mudaram de categoria com o motor novo")
+
+    tipos, situacoes = tipos_e_situacoes(len(ementas))
+    _conferir_lote(tipos, situacoes, ementas)
+
+    categorias = {categoria_de_ementa(e) for e in ementas}
+    antes = _ementas_por_segundo(categoria_de_ementa_anterior, ementas, args.repeticoes)
+    depois = _ementas_por_segundo(categoria_de_ementa, ementas, args.repeticoes)
+    lote = _ementas_por_segundo_lote(tipos, situacoes, ementas, args.repeticoes)
+    print(f"{len(ementas)} ementas ({len(categorias)} categorias distintas), {args.repeticoes} repetições "
+          f"- categorias idênticas; família e status de classificar_lote também")
+    print(f"antes  (regex por regra, IGNORECASE): {antes:10,.0f} ementas/s")
+    print(f"depois (RegrasOrdenadas):             {depois:10,.0f} ementas/s  ({depois / antes:.1f}x)")
+    print(f"classificar_lote (as três colunas):   {lote:10,.0f} proposituras/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark offline dos scrapers contra respostas gravadas (ver src/fixtures.py).
+
+Sobe o servidor de reprodução numa thread, aponta `config.scraping.base_url` para ele e
+roda a etapa escolhida contra um banco temporário, reportando tempo total, requisições,
+tentativas que falharam (retries) e o resultado da etapa. Latência e erros 5xx injetados
+tornam o teste de throughput/retry determinístico, sem rede.
+
+Uso (da raiz do repositório):
+    python -m src.main --mode full --record-fixtures fixtures/   # uma vez, com rede
+    python -m benchmarks.bench_offline fixtures/ --etapa proposituras --latencia 0.3 --taxa-erro 0.05
+"""
+
+import argparse
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.config import config
+from src.database import db_manager
+from src.fixtures import criar_servidor
+from src.scraper_proposituras import scrape_proposituras
+from src.scraper_vereadores import scrape_vereadores
+from src.utils import estatisticas_conexoes, taxas_por_host
+
+
+class _ContadorFalhas(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.falhas = 0
+
+    def emit(self, record):
+        if record.getMessage().startswith("Erro ao acessar"):
+            self.falhas += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", help="Diretório gravado com --record-fixtures")
+    parser.add_argument("--etapa", choices=["proposituras", "vereadores"], default="proposituras")
+    parser.add_argument("--latencia", type=float, default=0.2)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--status-erro", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--retry-delay", type=float, default=0.5,
+                        help="Base do backoff entre tentativas (o default do scraper, 5s, deixaria o teste lento)")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.fixtures, port=0, latencia=args.latencia,
+                              taxa_erro=args.taxa_erro, status_erro=args.status_erro,
+                              seed=args.seed, retry_after=args.retry_after)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    config.scraping.base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    config.scraping.cache_enabled = False
+    config.scraping.retry_delay = args.retry_delay
+
+    contador = _ContadorFalhas()
+    logging.getLogger("src").addHandler(contador)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.db_path = str(Path(tmp) / "bench.db")
+        db_manager.create_tables()
+
+        inicio = time.perf_counter()
+        resultado = scrape_proposituras() if args.etapa == "proposituras" else scrape_vereadores()
+        duracao = time.perf_counter() - inicio
+
+    servidor.shutdown()
+    conexoes = estatisticas_conexoes()
+    print(f"Etapa {args.etapa}: {resultado}")
+    print(f"Tempo total: {duracao:.2f}s")
+    print(f"Requisições: {conexoes['requisicoes']} ({conexoes['requisicoes'] / duracao:.1f}/s), "
+          f"falhas com retry: {contador.falhas}")
+    for host, taxa in taxas_por_host().items():
+        print(f"Taxa final de {host}: {taxa:.2f} req/s (inicial {config.scraping.requests_per_second:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Micro-benchmark de parse_documento_item: tempo por item antes/depois da extração em
+passada única (_campos_por_label), sobre a mesma árvore já montada.
+
+"Antes" é a versão anterior, reproduzida aqui: uma chamada de _valor_apos_label por campo
+(Data, Subtipo, Regime, Quórum, Situação, Ementa, Autoria/Autor), cada uma varrendo todos
+os <p> do item de novo. O script também confere que as duas versões produzem exatamente
+os mesmos PropositutaInfo.
+
+Uso (da raiz do repositório):
+    python -m benchmarks.bench_parse_item                      # página sintética
+    python -m benchmarks.bench_parse_item --html pagina.html   # página real salva com curl
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from src.config import config
+from src.database import PropositutaInfo
+from src.scraper_proposituras import _TITULO_RE, _split_autores, parse_documento_item
+from src.utils import clean_text, extract_id_from_href, make_soup, parse_date_br
+
+from .siscam_sintetico import pagina_resultados
+
+
+def _valor_apos_label(container, label):
+    label_normalizado = label.rstrip(": ").strip().lower()
+    for p in container.find_all("p"):
+        strong = p.find("strong")
+        if not strong:
+            continue
+        strong_text = clean_text(strong.get_text())
+        if strong_text.rstrip(": ").strip().lower() != label_normalizado:
+            continue
+        full_text = clean_text(p.get_text())
+        return full_text[len(strong_text):].strip(" :")
+    return None
+
+
+def parse_documento_item_anterior(item):
+    titulo_link = item.find("h4")
+    titulo_link = titulo_link.find("a") if titulo_link else None
+    if not titulo_link:
+        return None
+    doc_id = extract_id_from_href(titulo_link.get("href"))
+    if doc_id is None:
+        return None
+    titulo_texto = clean_text(titulo_link.get_text())
+    match = _TITULO_RE.match(titulo_texto)
+    if match:
+        tipo, numero, ano = match.group(1).strip(), int(match.group(2)), int(match.group(3))
+    else:
+        tipo, numero, ano = titulo_texto, None, None
+    data = parse_date_br(_valor_apos_label(item, "Data:"))
+    pdf_link = item.find("a", href=re.compile(r"handler=Arquivo"))
+    pdf_url = urljoin(config.scraping.base_url, pdf_link.get("href")) if pdf_link else None
+    autoria_texto = _valor_apos_label(item, "Autoria:") or _valor_apos_label(item, "Autor:")
+    return PropositutaInfo(
+        id=doc_id, tipo=tipo, subtipo=_valor_apos_label(item, "Subtipo:"), numero=numero, ano=ano,
+        data=data, regime=_valor_apos_label(item, "Regime:"), quorum=_valor_apos_label(item, "Quórum:"),
+        situacao=_valor_apos_label(item, "Situação:"), ementa=_valor_apos_label(item, "Ementa:"),
+        pdf_url=pdf_url, autores=_split_autores(autoria_texto),
+    )
+
+
+def _us_por_item(funcao, itens, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for item in itens:
+            funcao(item)
+    return (time.perf_counter() - inicio) / (repeticoes * len(itens)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--html", help="Página de resultados salva (default: sintética com 100 itens)")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    html = Path(args.html).read_text(encoding="utf-8") if args.html else pagina_resultados()
+    itens = make_soup(html).find_all("div", class_="data-list-item")
+
+    antes = [parse_documento_item_anterior(item) for item in itens]
+    depois = [parse_documento_item(item) for item in itens]
+    if antes != depois:
+        raise SystemExit("ERRO: a extração em passada única mudou o resultado do parse")
+
+    us_antes = _us_por_item(parse_documento_item_anterior, itens, args.repeticoes)
+    us_depois = _us_por_item(parse_documento_item, itens, args.repeticoes)
+    print(f"{len(itens)} itens, {args.repeticoes} repetições - resultados idênticos")
+    print(f"antes  (_valor_apos_label por campo): {us_antes:8.1f} µs/item")
+    print(f"depois (_campos_por_label):           {us_depois:8.1f} µs/item  ({us_antes / us_depois:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compara os backends de parse de uma página de resultados do Siscam.
+
+Para cada combinação de backend (html.parser, lxml) e modo (árvore completa ou só os
+div.data-list-item via SoupStrainer), mede o tempo de montar a árvore + converter todos
+os itens com parse_documento_item, e confere que a lista de PropositutaInfo é idêntica à
+do caminho atual (html.parser, árvore completa).
+
+Uso (da raiz do repositório):
+    python -m benchmarks.bench_parser                      # página sintética
+    python -m benchmarks.bench_parser --html pagina.html   # página real salva com curl
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from src.config import config
+from src.scraper_proposituras import ITENS_STRAINER, parse_documento_item
+from src.utils import make_soup
+
+from .siscam_sintetico import pagina_resultados
+
+
+def _parse(html, backend, strainer):
+    config.scraping.html_parser = backend
+    soup = make_soup(html, parse_only=strainer)
+    return [parse_documento_item(item) for item in soup.find_all("div", class_="data-list-item")]
+
+
+def _medir(html, backend, strainer, repeticoes):
+    """Tempo médio (ms) de montar a árvore e de converter os itens, separadamente."""
+    config.scraping.html_parser = backend
+    arvore = itens = 0.0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        soup = make_soup(html, parse_only=strainer)
+        meio = time.perf_counter()
+        [parse_documento_item(item) for item in soup.find_all("div", class_="data-list-item")]
+        arvore += meio - inicio
+        itens += time.perf_counter() - meio
+    return arvore / repeticoes * 1000, itens / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--html", help="Página de resultados salva (default: sintética com 100 itens)")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    html = Path(args.html).read_text(encoding="utf-8") if args.html else pagina_resultados()
+    referencia = _parse(html, "html.parser", None)
+    print(f"{len(referencia)} itens por página, {args.repeticoes} repetições\n")
+
+    for backend in ("html.parser", "lxml"):
+        for nome_modo, strainer in (("completo", None), ("strainer", ITENS_STRAINER)):
+            try:
+                resultado = _parse(html, backend, strainer)
+            except Exception as e:  # lxml é opcional
+                print(f"{backend:12} {nome_modo:9} indisponível ({e})")
+                continue
+            ms_arvore, ms_itens = _medir(html, backend, strainer, args.repeticoes)
+            identico = "idêntico" if repr(resultado) == repr(referencia) else "DIFERENTE"
+            print(
+                f"{backend:12} {nome_modo:9} árvore {ms_arvore:7.1f} ms + itens {ms_itens:7.1f} ms "
+                f"= {ms_arvore + ms_itens:7.1f} ms/página  {identico}"
+            )
+
+
+if __name__ == "__main__":
+    main()
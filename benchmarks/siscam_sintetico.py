@@ -0,0 +1,69 @@
+"""Página de resultados do Siscam (/Siscam/Documentos) gerada sinteticamente, com a mesma
+marcação que scraper_proposituras.parse_documento_item espera - para rodar os benchmarks
+sem acesso ao site. Para medir contra uma página real, salve uma com curl e passe --html.
+"""
+
+import random
+from datetime import date, timedelta
+
+TIPOS = ["Requerimento", "Indicação", "Moção", "Projeto de Lei", "Projeto de Decreto Legislativo"]
+SITUACOES = ["APROVADO", "Tramitando", "ARQUIVADO", "Deferido", "Encaminhado ao Executivo"]
+EMENTAS = [
+    "Secretário de Saúde - solicita-se informações sobre a falta de médicos na UBS do bairro {n}.",
+    "Indica-se ao Executivo a pavimentação da Rua {n} e a instalação de iluminação pública.",
+    "Denomina a Rua {n} do Jardim Aeroporto de \"Maria da Silva\".",
+    "Voto de congratulações à Escola Estadual {n} pelos 50 anos de fundação.",
+    "Institui no município de Botucatu a Semana Municipal de Conscientização {n}.",
+    "Solicita-se estudo para implantação de lombada na Avenida {n}, próximo à creche.",
+]
+AUTORES = [
+    "Fulano de Tal (Fulano)", "Beltrana Souza (Bel)", "Ciclano Pereira", "Mesa Diretora 2025/2026",
+]
+
+LAYOUT_TOPO = """<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8">
+<title>Documentos - Câmara Municipal de Botucatu</title>
+<link rel="stylesheet" href="/lib/bootstrap/css/bootstrap.min.css"></head><body>
+<nav class="navbar"><ul>{menu}</ul></nav>
+<main class="container"><form class="pesquisa-avancada">{filtros}</form>
+<p class="text-muted">{total} registros encontrados</p><div class="data-list">"""
+
+LAYOUT_RODAPE = """</div><nav><ul class="pagination">{paginas}</ul></nav></main>
+<footer class="rodape">{rodape}</footer></body></html>"""
+
+
+def _item(rng: random.Random, doc_id: int, data: date) -> str:
+    tipo = rng.choice(TIPOS)
+    autores = ", ".join(rng.sample(AUTORES, rng.randint(1, 3)))
+    rotulo_autoria = "Autoria" if "," in autores else "Autor"
+    ementa = rng.choice(EMENTAS).format(n=doc_id % 997)
+    return f"""
+<div class="data-list-item card mb-3"><div class="card-body">
+  <h4 class="card-title"><a href="/Siscam/Documentos/Details?id={doc_id}">{tipo} Nº {doc_id % 500 + 1}/{data.year}</a></h4>
+  <p class="mb-1"><strong>Data:</strong> {data:%d/%m/%Y}</p>
+  <p class="mb-1"><strong>Subtipo:</strong> Geral</p>
+  <p class="mb-1"><strong>Regime:</strong> Ordinário</p>
+  <p class="mb-1"><strong>Quórum:</strong> Maioria simples</p>
+  <p class="mb-1"><strong>Situação:</strong> {rng.choice(SITUACOES)}</p>
+  <p class="mb-1"><strong>Ementa:</strong> {ementa}</p>
+  <p class="mb-1"><strong>{rotulo_autoria}:</strong> {autores}</p>
+  <a class="btn btn-sm" href="/Siscam/Documentos/Details?handler=Arquivo&amp;id={doc_id}">Arquivo</a>
+</div></div>"""
+
+
+def pagina_resultados(pagina: int = 1, itens_por_pagina: int = 100, total: int = 7234,
+                      seed: int = 0) -> str:
+    rng = random.Random(seed * 100003 + pagina)
+    inicio = (pagina - 1) * itens_por_pagina
+    itens = []
+    for i in range(inicio, min(inicio + itens_por_pagina, total)):
+        data = date(2026, 7, 30) - timedelta(days=i * 2000 // total)
+        itens.append(_item(rng, 200000 - i, data))
+    menu = "".join(f'<li><a href="/secao/{i}">Seção {i}</a></li>' for i in range(40))
+    filtros = "".join(f'<select name="f{i}">' + "<option>x</option>" * 30 + "</select>" for i in range(8))
+    paginas = "".join(f'<li class="page-item"><a href="?CurrentPage={i}">{i}</a></li>' for i in range(1, 11))
+    rodape = "<p>Câmara Municipal de Botucatu</p>" * 20
+    return (
+        LAYOUT_TOPO.format(menu=menu, filtros=filtros, total=f"{total:,}".replace(",", "."))
+        + "".join(itens)
+        + LAYOUT_RODAPE.format(paginas=paginas, rodape=rodape)
+    )
@@ -0,0 +1,263 @@
+"""Classificação de cada propositura: categoria (assunto real da ementa), família (pelo tipo
+formal) e status (pela situação).
+
+As regras ficam em config.py (CATEGORIA_PATTERNS, DESTINATARIO_CATEGORIA, FAMILIA_POR_TIPO) e
+aqui (STATUS_POR_PALAVRA). O resultado é materializado na tabela proposituras_classificacao,
+com o hash das entradas (tipo/situação/ementa) e a versão das regras - export_json e
+gerar_resumos só recalculam as proposituras novas, as que mudaram e, quando alguma regra
+muda, todas (a versão é o hash das próprias regras, então basta editar config.py).
+
+`classificar` classifica uma propositura; `classificar_lote` recebe colunas inteiras e é o
+caminho comum de export_json, gerar_resumos e do dashboard, que só classificam o que ainda
+não está (atualizado) na tabela.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .config import CATEGORIA_PATTERNS, CATEGORIA_RESIDUAL, DESTINATARIO_CATEGORIA, FAMILIA_POR_TIPO
+from .database import db_manager
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Palavras (em maiúsculas) procuradas na situação, na ordem: a primeira que aparecer decide
+STATUS_POR_PALAVRA = [
+    ("Aprovado", ("APROVADO", "DEFERIDO", "CONVERTIDO", "TRANSFORMADO")),
+    ("Rejeitado", ("REJEITADO", "INDEFERIDO", "PREJUDICADO")),
+    ("Em tramitação", ("TRAMITANDO", "ENCAMINHA", "APRESENTADO")),
+    ("Arquivado/Retirado", ("ARQUIVADO", "RETIRADO", "ADIADO", "REVOGADA")),
+]
+STATUS_RESIDUAL = "Outra situação"
+FAMILIA_RESIDUAL = "Outros"
+
+_DESTINATARIO_PREFIXO_RE = re.compile(r"^([^-]{1,60})-\s*(indica-?se|solicita-?se|requer-?se)", re.IGNORECASE)
+
+# Sobe quando a LÓGICA abaixo muda de um jeito que altera resultados (mudanças só nas
+# regras de config.py já mudam VERSAO_REGRAS sozinhas)
+_VERSAO_ALGORITMO = 1
+
+
+def _versao_regras() -> str:
+    regras = [
+        _VERSAO_ALGORITMO, CATEGORIA_PATTERNS, CATEGORIA_RESIDUAL,
+        list(DESTINATARIO_CATEGORIA.items()),  # a ordem importa: a primeira chave que casar vence
+        _DESTINATARIO_PREFIXO_RE.pattern, sorted(FAMILIA_POR_TIPO.items()), FAMILIA_RESIDUAL,
+        STATUS_POR_PALAVRA, STATUS_RESIDUAL,
+    ]
+    return hashlib.sha256(json.dumps(regras, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+VERSAO_REGRAS = _versao_regras()
+
+
+@dataclass(frozen=True)
+class Classificacao:
+    categoria: str
+    familia: str
+    status: str
+
+
+def _maior_literal(sequencia) -> str:
+    """Maior trecho de caracteres literais consecutivos e obrigatórios de uma sequência já
+    parseada pelo sre_parse (âncoras como \\b não ocupam espaço e não interrompem o trecho)."""
+    melhor = atual = ""
+    for op, valor in sequencia:
+        if op is sre_parse.LITERAL:
+            atual += chr(valor)
+        elif op is not sre_parse.AT:
+            melhor, atual = max(melhor, atual, key=len), ""
+    return max(melhor, atual, key=len)
+
+
+def _literais_obrigatorios(padrao: str) -> Tuple[Optional[List[str]], bool]:
+    """(literais, puro): um literal por alternativa do padrão, que todo casamento daquela
+    alternativa contém - ou None se alguma não tiver. `puro` = o padrão é só a alternância
+    desses literais, então achar um deles já é o casamento."""
+    try:
+        arvore = list(sre_parse.parse(padrao))
+    except Exception:
+        return None, False
+    if len(arvore) == 1 and arvore[0][0] is sre_parse.BRANCH:
+        alternativas = [list(ramo) for ramo in arvore[0][1][1]]
+    else:
+        alternativas = [arvore]
+    literais = [_maior_literal(alternativa) for alternativa in alternativas]
+    if not all(literais):
+        return None, False
+    puro = all(op is sre_parse.LITERAL for alternativa in alternativas for op, _ in alternativa)
+    return literais, puro
+
+
+class RegrasOrdenadas:
+    """Regras (rótulo, regex) testadas em ordem de prioridade - a primeira que casar vence -
+    sobre texto já normalizado por _normalizar_texto (ASCII minúsculo).
+
+    Cada regra é pré-filtrada por literais extraídos do próprio regex (_literais_obrigatorios):
+    se nenhum aparece no texto (busca de substring, em C), a regra não tem como casar e o regex
+    nem roda. Só as candidatas são verificadas, na ordem. Uma alternância única com grupos
+    nomeados não serve aqui: o `re` acha o casamento mais à esquerda no texto, não o da regra
+    de maior prioridade, e por ser backtracking testa todas as alternativas em cada posição.
+
+    Como o texto é minúsculo, IGNORECASE só é usado nas regras que têm maiúsculas (que também
+    ficam sem pré-filtro) - para o `re`, ignorar caixa é bem mais lento."""
+
+    def __init__(self, regras: Sequence[Tuple[str, str]]):
+        self._regras = []
+        for rotulo, padrao in regras:
+            sem_escapes = re.sub(r"\\.", "", padrao)
+            if sem_escapes != sem_escapes.lower():
+                self._regras.append((rotulo, re.compile(padrao, re.IGNORECASE), None, False))
+                continue
+            literais, puro = _literais_obrigatorios(padrao)
+            self._regras.append((rotulo, re.compile(padrao), literais, puro))
+
+    def primeira(self, texto: str) -> Optional[str]:
+        for rotulo, regex, literais, puro in self._regras:
+            if literais is not None:
+                if not any(literal in texto for literal in literais):
+                    continue
+                if puro:
+                    return rotulo
+            if regex.search(texto):
+                return rotulo
+        return None
+
+
+_CATEGORIAS = RegrasOrdenadas(CATEGORIA_PATTERNS)
+# chaves de destinatário são substrings literais: cada uma vira uma regra "pura"
+_DESTINATARIOS = RegrasOrdenadas(
+    [(categoria, re.escape(chave)) for chave, categoria in DESTINATARIO_CATEGORIA.items()]
+)
+
+
+def _normalizar_texto(texto):
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return sem_acento.lower()
+
+
+def categoria_de_ementa(ementa):
+    """Assunto real da propositura (eixo independente de tipo/família) - ver
+    CATEGORIA_PATTERNS em config.py pro porquê da ordem e das regras."""
+    if not ementa:
+        return CATEGORIA_RESIDUAL
+    categoria = _CATEGORIAS.primeira(_normalizar_texto(ementa))
+    if categoria:
+        return categoria
+    m = _DESTINATARIO_PREFIXO_RE.match(ementa.strip())
+    if m:
+        categoria = _DESTINATARIOS.primeira(_normalizar_texto(m.group(1).strip()))
+        if categoria:
+            return categoria
+    return CATEGORIA_RESIDUAL
+
+
+def status_de_situacao(situacao):
+    s = (situacao or "").upper()
+    for status, palavras in STATUS_POR_PALAVRA:
+        if any(k in s for k in palavras):
+            return status
+    return STATUS_RESIDUAL
+
+
+def familia_de_tipo(tipo):
+    return FAMILIA_POR_TIPO.get(tipo, FAMILIA_RESIDUAL)
+
+
+def classificar(tipo, situacao, ementa) -> Classificacao:
+    return Classificacao(categoria_de_ementa(ementa), familia_de_tipo(tipo), status_de_situacao(situacao))
+
+
+def _valor(valor):
+    """NaN/NA do pandas viram None, como o NULL lido do banco."""
+    if valor is pd.NA or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    return valor
+
+
+def classificar_lote(tipos, situacoes, ementas) -> pd.DataFrame:
+    """classificar() em colunas inteiras (Series, listas ou arrays do mesmo tamanho): devolve
+    um DataFrame com as colunas familia, status e categoria, no índice de `ementas` se ela
+    for uma Series. É o caminho comum de export_json, gerar_resumos (via
+    classificacoes_proposituras) e do dashboard (via classificacoes_com_salvas).
+
+    Cada linha passa pelo mesmo motor de classificar(): sem pyarrow, refazer as regras com
+    operações de string do pandas ficou mais lento que o pré-filtro por literais de
+    RegrasOrdenadas (ver benchmarks/bench_classificador.py), além de ser uma segunda cópia
+    das regras para manter em sincronia."""
+    linhas = []
+    for tipo, situacao, ementa in zip(tipos, situacoes, ementas):
+        classificacao = classificar(_valor(tipo), _valor(situacao), _valor(ementa))
+        linhas.append((classificacao.familia, classificacao.status, classificacao.categoria))
+    index = ementas.index if isinstance(ementas, pd.Series) else None
+    return pd.DataFrame(linhas, columns=["familia", "status", "categoria"], index=index, dtype=object)
+
+
+def hash_entrada(tipo, situacao, ementa) -> str:
+    bruto = json.dumps([tipo, situacao, ementa], ensure_ascii=False)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()[:16]
+
+
+def classificacoes_proposituras(proposituras: Iterable[Mapping]) -> Dict[int, Classificacao]:
+    """Classificação de cada propositura (linhas com id, tipo, situacao e ementa), por id.
+
+    Vem de proposituras_classificacao quando o hash das entradas e a versão das regras
+    batem; as demais passam juntas por classificar_lote e são gravadas de volta na tabela."""
+    salvas = db_manager.classificacoes_salvas()
+    resultado: Dict[int, Classificacao] = {}
+    pendentes = []
+    for p in proposituras:
+        h = hash_entrada(p["tipo"], p["situacao"], p["ementa"])
+        salva = salvas.get(p["id"])
+        if salva and salva[0] == h and salva[1] == VERSAO_REGRAS:
+            resultado[p["id"]] = Classificacao(*salva[2:])
+        else:
+            pendentes.append((p, h))
+
+    recalculadas = []
+    if pendentes:
+        lote = classificar_lote(
+            [p["tipo"] for p, _ in pendentes], [p["situacao"] for p, _ in pendentes],
+            [p["ementa"] for p, _ in pendentes],
+        )
+        for (p, h), (familia, status, categoria) in zip(pendentes, lote.itertuples(index=False)):
+            resultado[p["id"]] = Classificacao(categoria, familia, status)
+            recalculadas.append((p["id"], h, VERSAO_REGRAS, categoria, familia, status))
+        db_manager.salvar_classificacoes(recalculadas)
+    logger.info(f"Classificação: {len(recalculadas)} proposituras (re)classificadas, "
+                f"{len(resultado) - len(recalculadas)} reaproveitadas (regras {VERSAO_REGRAS})")
+    return resultado
+
+
+def classificacoes_com_salvas(proposituras: pd.DataFrame, salvas: pd.DataFrame) -> pd.DataFrame:
+    """familia/status/categoria de cada linha de `proposituras` (colunas id, tipo, situacao e
+    ementa), no mesmo índice. Para quem lê o banco sem gravar (o dashboard): usa as linhas já
+    materializadas em `salvas` (colunas de proposituras_classificacao) quando o hash das
+    entradas e a versão das regras batem, e classificar_lote só para o resto."""
+    entradas = proposituras[["tipo", "situacao", "ementa"]]
+    hashes = [hash_entrada(*map(_valor, linha)) for linha in entradas.itertuples(index=False, name=None)]
+
+    atuais = salvas[salvas["versao_regras"] == VERSAO_REGRAS].set_index("propositura_id")
+    resultado = atuais.reindex(proposituras["id"].to_numpy())[["entrada_hash", "familia", "status", "categoria"]]
+    resultado.index = proposituras.index
+    validas = resultado["entrada_hash"].to_numpy(dtype=object) == pd.Series(hashes, dtype=object).to_numpy()
+    resultado = resultado[["familia", "status", "categoria"]].astype(object)
+
+    if not validas.all():
+        pendentes = entradas[~validas]
+        resultado.loc[pendentes.index] = classificar_lote(
+            pendentes["tipo"], pendentes["situacao"], pendentes["ementa"]
+        )[["familia", "status", "categoria"]]
+    return resultado
@@ -1,7 +1,7 @@
 import os
 from dataclasses import dataclass, field
 from datetime import date
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 
 @dataclass
@@ -25,10 +25,60 @@ class ScrapingConfig:
         "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     })
 
-    # Rate limiting / retry
-    request_delay: float = 1.0
+    # Rate limiting / retry. O limite é um orçamento agregado por host (token bucket em
+    # utils.bucket_do_host), não um intervalo fixo entre requisições - então várias podem
+    # estar em voo ao mesmo tempo (até max_concurrency) sem passar da taxa do host.
+    # O default é o mesmo orçamento do antigo request_delay = 1.0 (1 req/s, sem rajada):
+    # o servidor da Câmara é pequeno.
+    requests_per_second: float = 1.0   # taxa inicial de cada host
+    burst: int = 1
+    max_concurrency: int = 4
     max_retries: int = 3
-    retry_delay: float = 5.0
+    retry_delay: float = 5.0           # base do backoff (com jitter), dobra a cada tentativa
+    max_retry_delay: float = 60.0
+
+    # Controle adaptativo da taxa (utils.TaxaAdaptativa): sobe `rate_increase_step` a cada
+    # resposta boa em até `healthy_latency` segundos, multiplica por `rate_decrease_factor`
+    # em 429/5xx/timeout, sempre entre min_ e max_requests_per_second. O teto padrão é a
+    # própria taxa inicial: o controle só desacelera em caso de erro e volta a 1 req/s depois;
+    # subir o teto é uma decisão explícita de quem roda o scraper.
+    adaptive_rate: bool = True
+    min_requests_per_second: float = 0.25
+    max_requests_per_second: float = 1.0
+    rate_increase_step: float = 0.1
+    rate_decrease_factor: float = 0.5
+    healthy_latency: float = 2.0
+    # Perfis (/Vereadores/Details) buscados e parseados ao mesmo tempo em scrape_vereadores
+    profile_workers: int = 4
+    # Pipeline de proposituras (pipeline.py): max_concurrency threads de busca, parse_workers
+    # de parse e uma de gravação, ligadas por filas de pipeline_queue_size páginas
+    parse_workers: int = 2
+    pipeline_queue_size: int = 4
+
+    # Pool de conexões HTTP (keep-alive) compartilhado por todos os scrapers - ver utils.get_session
+    pool_connections: int = 4   # hosts distintos mantidos no pool
+    pool_maxsize: int = 8       # conexões abertas por host
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+
+    # Backend do BeautifulSoup: "html.parser" (stdlib) ou "lxml" (opcional, mais rápido -
+    # comparar com benchmarks/bench_parser.py antes de trocar)
+    html_parser: str = "html.parser"
+    # Parse só dos itens da lista (SoupStrainer) da página 2 em diante. Desligado: em
+    # benchmarks/bench_parser.py não ganhou nada com html.parser e perdeu com lxml
+    parse_so_itens: bool = False
+
+    # Cache de respostas em disco (ver http_cache.py). O TTL só vale para respostas sem
+    # ETag/Last-Modified dos caminhos em cache_ttl_paths (perfis, que quase não mudam) - com
+    # validadores, toda leitura vira um GET condicional, e as listagens e a busca de
+    # documentos sem validadores são sempre baixadas de novo.
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 6 * 3600
+    cache_ttl_paths: Tuple[str, ...] = ("/Vereadores/Details",)
+
+    # Se definido, grava cada resposta recebida nesse diretório (ver fixtures.py) para
+    # reproduzir a coleta offline depois
+    fixtures_record_dir: Optional[str] = None
 
     # Escopo: legislatura atual + anterior (2021-2028)
     data_inicio: date = date(2021, 1, 1)
@@ -39,10 +89,30 @@ class ScrapingConfig:
     items_per_page: int = 100
     ordenacao_data_decrescente: int = 3
 
+    # Modo incremental (--incremental): para depois de K páginas seguidas sem nenhuma
+    # propositura nova ou com situação/ementa alterada
+    incremental_paginas_inalteradas: int = 2
+
+
+@dataclass
+class DatabaseConfig:
+    """Conexão com o SQLite (ver DatabaseManager.get_connection)."""
+    # True: cada thread reaproveita uma única conexão aberta durante todo o processo.
+    # False: abre e fecha uma conexão a cada chamada (comportamento antigo).
+    persistent_connection: bool = True
+
+    # PRAGMAs aplicados a cada conexão aberta
+    journal_mode: str = "WAL"          # leitores (site/Streamlit) não bloqueiam o scraper
+    synchronous: str = "NORMAL"        # com WAL, fsync só no checkpoint - seguro contra crash do processo
+    cache_size_kib: int = 64 * 1024
+    mmap_size: int = 256 * 1024 * 1024
+    busy_timeout_ms: int = 5000
+
 
 @dataclass
 class Config:
     scraping: ScrapingConfig = field(default_factory=ScrapingConfig)
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
 
     data_dir: str = "data"
     img_dir: str = "img"
@@ -52,6 +122,10 @@ class Config:
     def db_path(self) -> str:
         return os.path.join(self.data_dir, "camara_botucatu.db")
 
+    @property
+    def http_cache_dir(self) -> str:
+        return os.path.join(self.data_dir, "http_cache")
+
     def __post_init__(self):
         for directory in [self.data_dir, self.img_dir, self.logs_dir]:
             os.makedirs(directory, exist_ok=True)
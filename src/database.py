@@ -1,10 +1,12 @@
+import json
 import sqlite3
+import threading
 import unicodedata
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from .config import config
 
@@ -13,6 +15,7 @@ CREATE TABLE IF NOT EXISTS vereadores (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     site_id INTEGER UNIQUE,        -- id de /Vereadores/Details?id=; NULL se conhecido só via Autoria
     nome TEXT NOT NULL UNIQUE,
+    nome_normalizado TEXT,         -- maiúsculas sem acento (ver _normalizar_nome), para casar nomes do portal
     apelido TEXT,
     partido TEXT,
     email TEXT,
@@ -20,6 +23,7 @@ CREATE TABLE IF NOT EXISTS vereadores (
     licenciado INTEGER NOT NULL DEFAULT 0,
     perfil_completo INTEGER NOT NULL DEFAULT 0,
     bio TEXT,
+    perfil_hash TEXT,              -- impressão digital da página de perfil (ver scraper_vereadores)
     updated_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
@@ -86,6 +90,103 @@ CREATE TABLE IF NOT EXISTS remuneracao_vereadores (
 
 CREATE INDEX IF NOT EXISTS idx_remuneracao_vereador ON remuneracao_vereadores(vereador_id);
 CREATE INDEX IF NOT EXISTS idx_remuneracao_ano_mes ON remuneracao_vereadores(ano, mes);
+
+-- Categoria/família/status de cada propositura (classificacao.py), guardados com o hash das
+-- entradas (tipo/situação/ementa) e a versão das regras - só é recalculado o que mudou
+CREATE TABLE IF NOT EXISTS proposituras_classificacao (
+    propositura_id INTEGER PRIMARY KEY REFERENCES proposituras(id),
+    entrada_hash TEXT NOT NULL,
+    versao_regras TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    familia TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Um registro por mês coletado do portal: sha256 do CSV exportado, para pular meses cujo
+-- CSV não mudou e saber quais meses ainda faltam (coleta incremental de remuneração)
+CREATE TABLE IF NOT EXISTS remuneracao_meses (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    csv_hash TEXT NOT NULL,
+    registros INTEGER NOT NULL,
+    coletado_em TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (ano, mes)
+);
+
+-- Execuções do scraper e progresso de cada etapa, para retomar (--resume) uma execução
+-- interrompida ou que falhou no meio sem refazer o que já foi gravado
+CREATE TABLE IF NOT EXISTS scrape_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    modo TEXT NOT NULL,            -- vereadores | proposituras | full | remuneracao
+    status TEXT NOT NULL DEFAULT 'em_andamento',  -- em_andamento | concluido | incompleto | falhou | interrompido
+    iniciado_em TEXT NOT NULL DEFAULT (datetime('now')),
+    finalizado_em TEXT
+);
+
+CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+    run_id INTEGER NOT NULL REFERENCES scrape_runs(id),
+    etapa TEXT NOT NULL,           -- vereadores | proposituras | remuneracao
+    progresso TEXT NOT NULL,       -- JSON: {"ultima_pagina": N}, {"site_ids": [...]}, {"meses": ["2025-01", ...]}
+    concluida INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (run_id, etapa)
+);
+
+-- Métricas de cada etapa de uma execução (metrics.py), para acompanhar a tendência entre
+-- execuções (--mode report)
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES scrape_runs(id),
+    etapa TEXT NOT NULL,
+    metrica TEXT NOT NULL,         -- requisicoes, retries, bytes_baixados, tempo_parse_s, pico_rss_mb...
+    valor REAL NOT NULL,
+    PRIMARY KEY (run_id, etapa, metrica)
+);
+"""
+
+# Colunas acrescentadas depois da criação do schema - bancos antigos as recebem em
+# create_tables. O índice de nome_normalizado fica fora do SCHEMA_SQL porque só pode ser
+# criado depois dessa migração.
+COLUNAS_MIGRADAS = {
+    "vereadores": {"nome_normalizado": "TEXT", "perfil_hash": "TEXT"},
+}
+
+INDICE_NOME_NORMALIZADO_SQL = """
+CREATE INDEX IF NOT EXISTS idx_vereadores_nome_normalizado ON vereadores(nome_normalizado)
+"""
+
+UPSERT_PROPOSITURA_SQL = """
+INSERT INTO proposituras (id, tipo, subtipo, numero, ano, data, regime, quorum,
+                           situacao, ementa, pdf_url, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+ON CONFLICT(id) DO UPDATE SET
+    tipo = excluded.tipo,
+    subtipo = excluded.subtipo,
+    numero = excluded.numero,
+    ano = excluded.ano,
+    data = excluded.data,
+    regime = excluded.regime,
+    quorum = excluded.quorum,
+    situacao = excluded.situacao,
+    ementa = excluded.ementa,
+    pdf_url = excluded.pdf_url,
+    updated_at = datetime('now')
+"""
+
+UPSERT_REMUNERACAO_SQL = """
+INSERT INTO remuneracao_vereadores
+    (vereador_id, nome_portal, cargo, ano, mes, proventos, liquido,
+     data_admissao, data_desligamento, unidade, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+ON CONFLICT(nome_portal, ano, mes) DO UPDATE SET
+    vereador_id = excluded.vereador_id,
+    cargo = excluded.cargo,
+    proventos = excluded.proventos,
+    liquido = excluded.liquido,
+    data_admissao = excluded.data_admissao,
+    data_desligamento = excluded.data_desligamento,
+    unidade = excluded.unidade,
+    updated_at = datetime('now')
 """
 
 
@@ -133,6 +234,12 @@ class PropositutaInfo:
     autores: List[tuple] = field(default_factory=list)
 
 
+@dataclass
+class CheckpointInfo:
+    progresso: Dict[str, Any]
+    concluida: bool
+
+
 @dataclass
 class RemuneracaoInfo:
     nome_portal: str
@@ -146,37 +253,136 @@ class RemuneracaoInfo:
     unidade: Optional[str]
 
 
+def _normalizar_nome(nome: str) -> str:
+    """Maiúsculas sem acento, para casar nomes entre Siscam e o portal de transparência
+    mesmo com pequenas diferenças de grafia."""
+    sem_acento = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.upper().split())
+
+
 class DatabaseManager:
     """Gerenciador de acesso ao banco SQLite (arquivo único, sem servidor)."""
 
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or config.db_path
+        self._local = threading.local()
+        # nome normalizado -> id do vereador, preenchido por buscar_vereador_por_nome e por
+        # tudo que cria/encontra vereadores (get_or_create_vereador_by_nome, lote de proposituras)
+        self._ids_por_nome: Dict[str, int] = {}
+        self._ids_por_nome_db: Optional[str] = None
+
+    def _abrir(self) -> sqlite3.Connection:
+        cfg = config.database
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=cfg.busy_timeout_ms / 1000)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA journal_mode = {cfg.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {cfg.synchronous}")
+        conn.execute(f"PRAGMA cache_size = -{int(cfg.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size = {int(cfg.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(cfg.busy_timeout_ms)}")
+        return conn
 
     @contextmanager
     def get_connection(self):
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
-        conn.row_factory = sqlite3.Row
+        """Conexão para um bloco de trabalho: commit ao sair, rollback se houver exceção.
+
+        Com `config.database.persistent_connection`, a conexão é aberta uma vez por thread e
+        reaproveitada (sem o custo de abrir/configurar a cada chamada); sem ela, cada bloco
+        externo abre e fecha a sua. Nos dois modos, blocos aninhados na mesma thread usam a
+        conexão do bloco externo e compartilham a transação - só o mais externo faz
+        commit/rollback (é o que deixa página e checkpoint atômicos em scraper_proposituras)."""
+        if not config.database.persistent_connection:
+            externa = getattr(self._local, "conn_bloco", None)
+            if externa is not None:
+                yield externa
+                return
+            conn = self._abrir()
+            self._local.conn_bloco = conn
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._local.conn_bloco = None
+                conn.close()
+            return
+
+        local = self._local
+        if getattr(local, "conn", None) is None or local.db_path != self.db_path:
+            self.close()
+            local.conn = self._abrir()
+            local.db_path = self.db_path
+            local.profundidade = 0
+
+        conn = local.conn
+        local.profundidade += 1
         try:
             yield conn
-            conn.commit()
+            if local.profundidade == 1:
+                conn.commit()
         except Exception:
-            conn.rollback()
+            if local.profundidade == 1:
+                conn.rollback()
             raise
         finally:
-            conn.close()
+            local.profundidade -= 1
+
+    def close(self):
+        """Fecha a conexão persistente da thread atual (a próxima chamada abre outra)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        conn.close()
 
     def create_tables(self):
         with self.get_connection() as conn:
             conn.executescript(SCHEMA_SQL)
+            for tabela, novas in COLUNAS_MIGRADAS.items():
+                colunas = {row["name"] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+                for coluna, tipo in novas.items():
+                    if coluna not in colunas:
+                        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+            pendentes = conn.execute("SELECT id, nome FROM vereadores WHERE nome_normalizado IS NULL").fetchall()
+            conn.executemany(
+                "UPDATE vereadores SET nome_normalizado = ? WHERE id = ?",
+                [(_normalizar_nome(row["nome"]), row["id"]) for row in pendentes],
+            )
+            conn.execute(INDICE_NOME_NORMALIZADO_SQL)
+
+    def _cache_nomes(self) -> Dict[str, int]:
+        """Cache nome normalizado -> id, descartado se o manager passar a apontar para outro banco."""
+        if self._ids_por_nome_db != self.db_path:
+            self._ids_por_nome = {}
+            self._ids_por_nome_db = self.db_path
+        return self._ids_por_nome
+
+    def _cachear_menores_ids(self, conn: sqlite3.Connection, nomes_normalizados: Iterable[str]):
+        """Põe no cache de nomes o menor id de cada nome normalizado - o mesmo que
+        buscar_vereador_por_nome e upsert_remuneracoes devolveriam consultando o banco."""
+        nomes = list(set(nomes_normalizados))
+        if not nomes:
+            return
+        marcadores = ", ".join("?" for _ in nomes)
+        cache = self._cache_nomes()
+        for row in conn.execute(
+            f"""SELECT nome_normalizado, MIN(id) id FROM vereadores
+                WHERE nome_normalizado IN ({marcadores}) GROUP BY nome_normalizado""",
+            nomes,
+        ):
+            cache[row["nome_normalizado"]] = row["id"]
 
     # ------------------------------------------------------------------ #
     # Vereadores
     # ------------------------------------------------------------------ #
 
-    def upsert_vereador(self, info: VereadorInfo) -> int:
+    def upsert_vereador(self, info: VereadorInfo, perfil_hash: Optional[str] = None) -> int:
         """Insere/atualiza um vereador com perfil completo (vem de /Vereadores/Details).
+        `perfil_hash` é a impressão digital da página que originou `info`.
 
         Verifica manualmente por site_id e, em seguida, por nome (em vez de confiar num único
         alvo de ON CONFLICT) porque um mesmo vereador pode já existir como registro mínimo
@@ -187,45 +393,71 @@ class DatabaseManager:
             if not row:
                 row = conn.execute("SELECT id FROM vereadores WHERE nome = ?", (info.nome,)).fetchone()
 
+            nome_normalizado = _normalizar_nome(info.nome)
             if row:
+                vereador_id = row["id"]
                 conn.execute(
                     """
                     UPDATE vereadores SET
-                        site_id = ?, nome = ?, apelido = ?, partido = ?, email = ?, foto_url = ?,
-                        licenciado = ?, perfil_completo = 1, bio = ?, updated_at = datetime('now')
+                        site_id = ?, nome = ?, nome_normalizado = ?, apelido = ?, partido = ?, email = ?,
+                        foto_url = ?, licenciado = ?, perfil_completo = 1, bio = ?, perfil_hash = ?,
+                        updated_at = datetime('now')
                     WHERE id = ?
                     """,
-                    (info.site_id, info.nome, info.apelido, info.partido, info.email,
-                     info.foto_url, int(info.licenciado), info.bio, row["id"]),
+                    (info.site_id, info.nome, nome_normalizado, info.apelido, info.partido, info.email,
+                     info.foto_url, int(info.licenciado), info.bio, perfil_hash, vereador_id),
                 )
-                return row["id"]
+                # o nome pode ter mudado: tira do cache qualquer nome antigo que apontava para este id
+                cache = self._cache_nomes()
+                for chave in [chave for chave, id_ in cache.items() if id_ == vereador_id]:
+                    del cache[chave]
+            else:
+                cur = conn.execute(
+                    """
+                    INSERT INTO vereadores (site_id, nome, nome_normalizado, apelido, partido, email,
+                                             foto_url, licenciado, perfil_completo, bio, perfil_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+                    """,
+                    (info.site_id, info.nome, nome_normalizado, info.apelido, info.partido, info.email,
+                     info.foto_url, int(info.licenciado), info.bio, perfil_hash),
+                )
+                vereador_id = cur.lastrowid
+            self._cachear_menores_ids(conn, [nome_normalizado])
+            return vereador_id
 
-            cur = conn.execute(
-                """
-                INSERT INTO vereadores (site_id, nome, apelido, partido, email, foto_url,
-                                         licenciado, perfil_completo, bio)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
-                """,
-                (info.site_id, info.nome, info.apelido, info.partido, info.email,
-                 info.foto_url, int(info.licenciado), info.bio),
-            )
-            return cur.lastrowid
+    def hashes_perfis(self) -> Dict[int, Optional[str]]:
+        """{site_id: perfil_hash} dos vereadores com perfil completo já gravado."""
+        with self.get_connection() as conn:
+            return {
+                row["site_id"]: row["perfil_hash"]
+                for row in conn.execute(
+                    "SELECT site_id, perfil_hash FROM vereadores WHERE site_id IS NOT NULL AND perfil_completo = 1"
+                )
+            }
 
     def get_or_create_vereador_by_nome(self, nome: str, apelido: Optional[str] = None) -> int:
         """Usado para autores encontrados apenas via 'Autoria' de proposituras (ex-vereadores
-        de legislaturas anteriores que não têm mais perfil em /Vereadores)."""
+        de legislaturas anteriores que não têm mais perfil em /Vereadores).
+
+        O menor id com o mesmo nome normalizado (que pode não ser o encontrado/criado aqui) entra
+        no cache de nomes, então uma busca posterior pelo mesmo nome (ex.: buscar_vereador_por_nome
+        na carga de remuneração) não vai ao banco."""
+        nome_normalizado = _normalizar_nome(nome)
         with self.get_connection() as conn:
             row = conn.execute("SELECT id FROM vereadores WHERE nome = ?", (nome,)).fetchone()
             if row:
-                return row["id"]
-            cur = conn.execute(
-                """
-                INSERT INTO vereadores (site_id, nome, apelido, perfil_completo)
-                VALUES (NULL, ?, ?, 0)
-                """,
-                (nome, apelido),
-            )
-            return cur.lastrowid
+                vereador_id = row["id"]
+            else:
+                cur = conn.execute(
+                    """
+                    INSERT INTO vereadores (site_id, nome, nome_normalizado, apelido, perfil_completo)
+                    VALUES (NULL, ?, ?, ?, 0)
+                    """,
+                    (nome, nome_normalizado, apelido),
+                )
+                vereador_id = cur.lastrowid
+            self._cachear_menores_ids(conn, [nome_normalizado])
+        return vereador_id
 
     def replace_legislaturas(self, vereador_id: int, legislaturas: List[LegislaturaInfo]):
         with self.get_connection() as conn:
@@ -255,32 +487,105 @@ class DatabaseManager:
     # Proposituras
     # ------------------------------------------------------------------ #
 
+    @staticmethod
+    def _propositura_params(info: PropositutaInfo) -> tuple:
+        return (info.id, info.tipo, info.subtipo, info.numero, info.ano,
+                info.data.isoformat() if info.data else None,
+                info.regime, info.quorum, info.situacao, info.ementa, info.pdf_url)
+
     def upsert_propositura(self, info: PropositutaInfo) -> None:
         with self.get_connection() as conn:
-            conn.execute(
+            conn.execute(UPSERT_PROPOSITURA_SQL, self._propositura_params(info))
+            # Autoria pode mudar de página para página em reprocessamentos raros; garantir consistência
+            conn.execute("DELETE FROM propositura_autores WHERE propositura_id = ?", (info.id,))
+
+    def upsert_proposituras_lote(self, infos: List[PropositutaInfo]) -> int:
+        """Grava uma página inteira de resultados - proposituras, autores ainda sem cadastro e
+        vínculos de autoria - numa única transação, com executemany.
+
+        Equivale a chamar upsert_propositura + get_or_create_vereador_by_nome + link_autor
+        item a item, mas com um commit (e um fsync) por página em vez de vários por
+        propositura. Retorna o número de linhas gravadas (proposituras + vínculos)."""
+        if not infos:
+            return 0
+
+        autores: Dict[str, Optional[str]] = {}
+        for info in infos:
+            for nome, apelido in info.autores:
+                autores.setdefault(nome, apelido)
+
+        with self.get_connection() as conn:
+            conn.executemany(UPSERT_PROPOSITURA_SQL, [self._propositura_params(info) for info in infos])
+            conn.executemany(
+                "DELETE FROM propositura_autores WHERE propositura_id = ?", [(info.id,) for info in infos]
+            )
+            if not autores:
+                return len(infos)
+
+            conn.executemany(
+                """INSERT OR IGNORE INTO vereadores (site_id, nome, nome_normalizado, apelido, perfil_completo)
+                   VALUES (NULL, ?, ?, ?, 0)""",
+                [(nome, _normalizar_nome(nome), apelido) for nome, apelido in autores.items()],
+            )
+            marcadores = ", ".join("?" for _ in autores)
+            ids = {
+                row["nome"]: row["id"]
+                for row in conn.execute(f"SELECT id, nome FROM vereadores WHERE nome IN ({marcadores})", list(autores))
+            }
+            self._cachear_menores_ids(conn, (_normalizar_nome(nome) for nome in ids))
+            vinculos = [(info.id, ids[nome]) for info in infos for nome, _ in info.autores]
+            conn.executemany(
+                """INSERT OR IGNORE INTO propositura_autores (propositura_id, vereador_id)
+                   VALUES (?, ?)""",
+                vinculos,
+            )
+        return len(infos) + len(vinculos)
+
+    def estado_proposituras(self, infos: List[PropositutaInfo]) -> Tuple[Set[int], Set[int]]:
+        """(ids de `infos` que já estão no banco, ids que já estão com a mesma situação e ementa)."""
+        if not infos:
+            return set(), set()
+        marcadores = ", ".join("?" for _ in infos)
+        with self.get_connection() as conn:
+            atuais = {
+                row["id"]: (row["situacao"], row["ementa"])
+                for row in conn.execute(
+                    f"SELECT id, situacao, ementa FROM proposituras WHERE id IN ({marcadores})",
+                    [info.id for info in infos],
+                )
+            }
+        inalteradas = {info.id for info in infos if atuais.get(info.id) == (info.situacao, info.ementa)}
+        return set(atuais), inalteradas
+
+    def classificacoes_salvas(self) -> Dict[int, Tuple[str, str, str, str, str]]:
+        """{propositura_id: (entrada_hash, versao_regras, categoria, familia, status)}"""
+        with self.get_connection() as conn:
+            return {
+                row[0]: tuple(row[1:])
+                for row in conn.execute(
+                    """SELECT propositura_id, entrada_hash, versao_regras, categoria, familia, status
+                       FROM proposituras_classificacao"""
+                )
+            }
+
+    def salvar_classificacoes(self, linhas: List[Tuple[int, str, str, str, str, str]]):
+        """Grava (propositura_id, entrada_hash, versao_regras, categoria, familia, status)."""
+        with self.get_connection() as conn:
+            conn.executemany(
                 """
-                INSERT INTO proposituras (id, tipo, subtipo, numero, ano, data, regime, quorum,
-                                           situacao, ementa, pdf_url, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                ON CONFLICT(id) DO UPDATE SET
-                    tipo = excluded.tipo,
-                    subtipo = excluded.subtipo,
-                    numero = excluded.numero,
-                    ano = excluded.ano,
-                    data = excluded.data,
-                    regime = excluded.regime,
-                    quorum = excluded.quorum,
-                    situacao = excluded.situacao,
-                    ementa = excluded.ementa,
-                    pdf_url = excluded.pdf_url,
+                INSERT INTO proposituras_classificacao
+                    (propositura_id, entrada_hash, versao_regras, categoria, familia, status, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(propositura_id) DO UPDATE SET
+                    entrada_hash = excluded.entrada_hash,
+                    versao_regras = excluded.versao_regras,
+                    categoria = excluded.categoria,
+                    familia = excluded.familia,
+                    status = excluded.status,
                     updated_at = datetime('now')
                 """,
-                (info.id, info.tipo, info.subtipo, info.numero, info.ano,
-                 info.data.isoformat() if info.data else None,
-                 info.regime, info.quorum, info.situacao, info.ementa, info.pdf_url),
+                linhas,
             )
-            # Autoria pode mudar de página para página em reprocessamentos raros; garantir consistência
-            conn.execute("DELETE FROM propositura_autores WHERE propositura_id = ?", (info.id,))
 
     def link_autor(self, propositura_id: int, vereador_id: int):
         with self.get_connection() as conn:
@@ -294,45 +599,187 @@ class DatabaseManager:
     # Remuneração (portal de transparência)
     # ------------------------------------------------------------------ #
 
-    @staticmethod
-    def _normalizar_nome(nome: str) -> str:
-        """Maiúsculas sem acento, para casar nomes entre Siscam e o portal de transparência
-        mesmo com pequenas diferenças de grafia."""
-        sem_acento = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii")
-        return " ".join(sem_acento.upper().split())
-
     def buscar_vereador_por_nome(self, nome: str) -> Optional[int]:
-        alvo = self._normalizar_nome(nome)
+        """id do vereador cujo nome normalizado é igual ao de `nome` (cache em memória e,
+        se não estiver lá, consulta pelo índice de nome_normalizado). Havendo mais de um,
+        vale o de menor id."""
+        alvo = _normalizar_nome(nome)
+        cache = self._cache_nomes()
+        if alvo in cache:
+            return cache[alvo]
         with self.get_connection() as conn:
-            for row in conn.execute("SELECT id, nome FROM vereadores"):
-                if self._normalizar_nome(row["nome"]) == alvo:
-                    return row["id"]
-        return None
+            row = conn.execute(
+                "SELECT MIN(id) id FROM vereadores WHERE nome_normalizado = ?", (alvo,)
+            ).fetchone()
+        if row["id"] is None:
+            return None
+        cache[alvo] = row["id"]
+        return row["id"]
+
+    @staticmethod
+    def _remuneracao_params(info: RemuneracaoInfo, vereador_id: Optional[int]) -> tuple:
+        return (vereador_id, info.nome_portal, info.cargo, info.ano, info.mes,
+                info.proventos, info.liquido, info.data_admissao, info.data_desligamento,
+                info.unidade)
 
     def upsert_remuneracao(self, info: RemuneracaoInfo) -> None:
         vereador_id = self.buscar_vereador_por_nome(info.nome_portal)
+        with self.get_connection() as conn:
+            conn.execute(UPSERT_REMUNERACAO_SQL, self._remuneracao_params(info, vereador_id))
+
+    def upsert_remuneracoes(self, registros: Iterable[RemuneracaoInfo]) -> int:
+        """Grava um lote de remunerações (ex.: um mês inteiro do portal) num único executemany,
+        consumindo `registros` à medida que o executemany avança - dá para passar direto o
+        gerador do parser de CSV. Os vereador_id saem de um mapa nome normalizado -> id
+        montado uma vez por lote (mesma regra de buscar_vereador_por_nome: vale o menor id).
+        Retorna o número de registros gravados."""
+        gravados = 0
+
+        with self.get_connection() as conn:
+            ids = {
+                row["nome_normalizado"]: row["id"]
+                for row in conn.execute(
+                    """SELECT nome_normalizado, MIN(id) id FROM vereadores
+                       WHERE nome_normalizado IS NOT NULL GROUP BY nome_normalizado"""
+                )
+            }
+
+            def _params():
+                nonlocal gravados
+                for info in registros:
+                    gravados += 1
+                    yield self._remuneracao_params(info, ids.get(_normalizar_nome(info.nome_portal)))
+
+            conn.executemany(UPSERT_REMUNERACAO_SQL, _params())
+        return gravados
+
+    def meses_remuneracao(self) -> Dict[Tuple[int, int], Optional[str]]:
+        """{(ano, mês): csv_hash} dos meses já coletados. Meses gravados antes de existir
+        remuneracao_meses aparecem com hash None (presentes, mas sem impressão do CSV)."""
+        with self.get_connection() as conn:
+            meses: Dict[Tuple[int, int], Optional[str]] = {
+                (row["ano"], row["mes"]): None
+                for row in conn.execute("SELECT DISTINCT ano, mes FROM remuneracao_vereadores")
+            }
+            for row in conn.execute("SELECT ano, mes, csv_hash FROM remuneracao_meses"):
+                meses[(row["ano"], row["mes"])] = row["csv_hash"]
+        return meses
+
+    def registrar_mes_remuneracao(self, ano: int, mes: int, csv_hash: str, registros: int):
         with self.get_connection() as conn:
             conn.execute(
                 """
-                INSERT INTO remuneracao_vereadores
-                    (vereador_id, nome_portal, cargo, ano, mes, proventos, liquido,
-                     data_admissao, data_desligamento, unidade, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                ON CONFLICT(nome_portal, ano, mes) DO UPDATE SET
-                    vereador_id = excluded.vereador_id,
-                    cargo = excluded.cargo,
-                    proventos = excluded.proventos,
-                    liquido = excluded.liquido,
-                    data_admissao = excluded.data_admissao,
-                    data_desligamento = excluded.data_desligamento,
-                    unidade = excluded.unidade,
+                INSERT INTO remuneracao_meses (ano, mes, csv_hash, registros, coletado_em)
+                VALUES (?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(ano, mes) DO UPDATE SET
+                    csv_hash = excluded.csv_hash,
+                    registros = excluded.registros,
+                    coletado_em = datetime('now')
+                """,
+                (ano, mes, csv_hash, registros),
+            )
+
+    # ------------------------------------------------------------------ #
+    # Execuções e checkpoints (--resume)
+    # ------------------------------------------------------------------ #
+
+    def iniciar_execucao(self, modo: str, retomar: bool = False) -> Tuple[int, bool]:
+        """Registra uma execução e devolve (run_id, retomada). Com `retomar`, reabre a
+        execução mais recente do mesmo modo que não terminou como 'concluido', se houver."""
+        with self.get_connection() as conn:
+            if retomar:
+                row = conn.execute(
+                    """SELECT id FROM scrape_runs WHERE modo = ? AND status != 'concluido'
+                       ORDER BY id DESC LIMIT 1""",
+                    (modo,),
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE scrape_runs SET status = 'em_andamento', finalizado_em = NULL WHERE id = ?",
+                        (row["id"],),
+                    )
+                    return row["id"], True
+            cur = conn.execute("INSERT INTO scrape_runs (modo) VALUES (?)", (modo,))
+            return cur.lastrowid, False
+
+    def finalizar_execucao(self, run_id: int, status: str):
+        with self.get_connection() as conn:
+            conn.execute(
+                "UPDATE scrape_runs SET status = ?, finalizado_em = datetime('now') WHERE id = ?",
+                (status, run_id),
+            )
+
+    def checkpoint(self, run_id: int, etapa: str) -> Optional[CheckpointInfo]:
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT progresso, concluida FROM scrape_checkpoints WHERE run_id = ? AND etapa = ?",
+                (run_id, etapa),
+            ).fetchone()
+        if not row:
+            return None
+        return CheckpointInfo(progresso=json.loads(row["progresso"]), concluida=bool(row["concluida"]))
+
+    def salvar_checkpoint(self, run_id: int, etapa: str, progresso: Dict[str, Any], concluida: bool = False):
+        """Grava o progresso da etapa. Chamado dentro do mesmo bloco get_connection() da
+        gravação dos dados, o checkpoint entra na mesma transação que eles."""
+        with self.get_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO scrape_checkpoints (run_id, etapa, progresso, concluida, updated_at)
+                VALUES (?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(run_id, etapa) DO UPDATE SET
+                    progresso = excluded.progresso,
+                    concluida = excluded.concluida,
                     updated_at = datetime('now')
                 """,
-                (vereador_id, info.nome_portal, info.cargo, info.ano, info.mes,
-                 info.proventos, info.liquido, info.data_admissao, info.data_desligamento,
-                 info.unidade),
+                (run_id, etapa, json.dumps(progresso, ensure_ascii=False), int(concluida)),
+            )
+
+    # ------------------------------------------------------------------ #
+    # Métricas por execução (metrics.py, --mode report)
+    # ------------------------------------------------------------------ #
+
+    def salvar_metricas_execucao(self, run_id: int, por_etapa: Dict[str, Dict[str, float]]):
+        """Grava as métricas de cada etapa. Numa execução retomada (--resume) os contadores
+        se somam aos da tentativa anterior e o pico de RSS fica com o maior dos dois."""
+        with self.get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO run_metrics (run_id, etapa, metrica, valor) VALUES (?, ?, ?, ?)
+                ON CONFLICT(run_id, etapa, metrica) DO UPDATE SET
+                    valor = CASE WHEN metrica = 'pico_rss_mb' THEN MAX(valor, excluded.valor)
+                                 ELSE valor + excluded.valor END
+                """,
+                [
+                    (run_id, etapa, metrica, valor)
+                    for etapa, contadores in por_etapa.items()
+                    for metrica, valor in contadores.items()
+                ],
             )
 
+    def metricas_execucoes(self, limite: int) -> List[Dict[str, Any]]:
+        """As `limite` execuções mais recentes com métricas, da mais antiga para a mais nova:
+        [{"run_id", "modo", "status", "iniciado_em", "etapas": {etapa: {metrica: valor}}}]."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT r.id, r.modo, r.status, r.iniciado_em, m.etapa, m.metrica, m.valor
+                FROM scrape_runs r
+                JOIN run_metrics m ON m.run_id = r.id
+                WHERE r.id IN (SELECT DISTINCT run_id FROM run_metrics ORDER BY run_id DESC LIMIT ?)
+                ORDER BY r.id
+                """,
+                (limite,),
+            ).fetchall()
+        execucoes: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            execucao = execucoes.setdefault(row["id"], {
+                "run_id": row["id"], "modo": row["modo"], "status": row["status"],
+                "iniciado_em": row["iniciado_em"], "etapas": {},
+            })
+            execucao["etapas"].setdefault(row["etapa"], {})[row["metrica"]] = row["valor"]
+        return list(execucoes.values())
+
     # ------------------------------------------------------------------ #
     # Estatísticas (usadas pelo CLI e como sanity-check)
     # ------------------------------------------------------------------ #
@@ -1,25 +1,20 @@
 #!/usr/bin/env python3
 """Exporta o recorte da legislatura atual para JSON estático, consumido pelo site em site/data/.
 
-A categorização (família/status) é calculada aqui, em Python, para que o JavaScript do site
-nunca precise reimplementar essas regras - ele só lê e exibe.
+A categorização (categoria/família/status) é calculada em Python (classificacao.py, com cache
+no banco), para que o JavaScript do site nunca precise reimplementar essas regras - ele só lê
+e exibe.
 """
 
+import argparse
 import json
-import re
-import sqlite3
-import unicodedata
 from datetime import datetime, timezone
 from pathlib import Path
 
-from .config import (
-    CATEGORIA_PATTERNS,
-    CATEGORIA_RESIDUAL,
-    CATEGORIAS_CERIMONIAIS,
-    DESTINATARIO_CATEGORIA,
-    FAMILIA_POR_TIPO,
-    config,
-)
+from .classificacao import classificacoes_proposituras
+from .config import CATEGORIA_PATTERNS, CATEGORIA_RESIDUAL, CATEGORIAS_CERIMONIAIS
+from .database import db_manager
+from .profiling import MODOS_PROFILE, profiler
 
 OUTPUT_DIR = Path("site/data")
 RESUMOS_PATH = Path("src/resumos_atuacao.json")
@@ -33,14 +28,6 @@ FAMILIA_LABEL = {
 
 CATEGORIAS_ORDEM = [nome for nome, _ in CATEGORIA_PATTERNS] + [CATEGORIA_RESIDUAL]
 
-_CATEGORIA_COMPILADAS = [(nome, re.compile(padrao, re.IGNORECASE)) for nome, padrao in CATEGORIA_PATTERNS]
-_DESTINATARIO_PREFIXO_RE = re.compile(r"^([^-]{1,60})-\s*(indica-?se|solicita-?se|requer-?se)", re.IGNORECASE)
-
-
-def _normalizar_texto(texto):
-    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
-    return sem_acento.lower()
-
 
 def _formatar_moeda(valor):
     texto = f"{valor:,.2f}"
@@ -59,37 +46,6 @@ def _frase_custo(estim):
     return f"Até o momento, o vereador custou aos cofres públicos {_formatar_moeda(estim['estimativa_total'])} em remuneração (estimativa)."
 
 
-def categoria_de_ementa(ementa):
-    """Assunto real da propositura (eixo independente de tipo/família) - ver
-    CATEGORIA_PATTERNS em config.py pro porquê da ordem e das regras."""
-    if not ementa:
-        return CATEGORIA_RESIDUAL
-    texto_normalizado = _normalizar_texto(ementa)
-    for nome, padrao in _CATEGORIA_COMPILADAS:
-        if padrao.search(texto_normalizado):
-            return nome
-    m = _DESTINATARIO_PREFIXO_RE.match(ementa.strip())
-    if m:
-        destinatario = _normalizar_texto(m.group(1).strip())
-        for chave, categoria in DESTINATARIO_CATEGORIA.items():
-            if chave in destinatario:
-                return categoria
-    return CATEGORIA_RESIDUAL
-
-
-def status_de_situacao(situacao):
-    s = (situacao or "").upper()
-    if any(k in s for k in ["APROVADO", "DEFERIDO", "CONVERTIDO", "TRANSFORMADO"]):
-        return "Aprovado"
-    if any(k in s for k in ["REJEITADO", "INDEFERIDO", "PREJUDICADO"]):
-        return "Rejeitado"
-    if any(k in s for k in ["TRAMITANDO", "ENCAMINHA", "APRESENTADO"]):
-        return "Em tramitação"
-    if any(k in s for k in ["ARQUIVADO", "RETIRADO", "ADIADO", "REVOGADA"]):
-        return "Arquivado/Retirado"
-    return "Outra situação"
-
-
 def _escrever(nome, conteudo):
     (OUTPUT_DIR / nome).write_text(json.dumps(conteudo, ensure_ascii=False), encoding="utf-8")
 
@@ -135,28 +91,27 @@ def _estimativas_por_vereador(remuneracao_rows, legislatura_atual_inicio):
 
 
 def exportar():
-    conn = sqlite3.connect(config.db_path)
-    conn.row_factory = sqlite3.Row
-
-    legislaturas_rows = conn.execute("SELECT * FROM legislaturas").fetchall()
-    datas_inicio = [r["data_inicio"] for r in legislaturas_rows if r["data_inicio"]]
-    legislatura_atual_inicio = max(datas_inicio)  # ISO "YYYY-MM-DD", comparável como texto
-
-    vereadores_rows = conn.execute(
-        "SELECT * FROM vereadores WHERE perfil_completo = 1 ORDER BY nome"
-    ).fetchall()
-    vereador_ids = {r["id"] for r in vereadores_rows}
-
-    comissoes_rows = conn.execute("SELECT * FROM comissoes").fetchall()
-    proposituras_rows = conn.execute(
-        "SELECT * FROM proposituras WHERE data >= ? ORDER BY data DESC", (legislatura_atual_inicio,)
-    ).fetchall()
-    autores_rows = conn.execute("SELECT * FROM propositura_autores").fetchall()
-    remuneracao_rows = conn.execute(
-        "SELECT * FROM remuneracao_vereadores WHERE vereador_id IS NOT NULL ORDER BY ano, mes"
-    ).fetchall()
-    conn.close()
-
+    db_manager.create_tables()  # bancos antigos ainda sem a tabela de classificações
+    with db_manager.get_connection() as conn:
+        legislaturas_rows = conn.execute("SELECT * FROM legislaturas").fetchall()
+        datas_inicio = [r["data_inicio"] for r in legislaturas_rows if r["data_inicio"]]
+        legislatura_atual_inicio = max(datas_inicio)  # ISO "YYYY-MM-DD", comparável como texto
+
+        vereadores_rows = conn.execute(
+            "SELECT * FROM vereadores WHERE perfil_completo = 1 ORDER BY nome"
+        ).fetchall()
+        vereador_ids = {r["id"] for r in vereadores_rows}
+
+        comissoes_rows = conn.execute("SELECT * FROM comissoes").fetchall()
+        proposituras_rows = conn.execute(
+            "SELECT * FROM proposituras WHERE data >= ? ORDER BY data DESC", (legislatura_atual_inicio,)
+        ).fetchall()
+        autores_rows = conn.execute("SELECT * FROM propositura_autores").fetchall()
+        remuneracao_rows = conn.execute(
+            "SELECT * FROM remuneracao_vereadores WHERE vereador_id IS NOT NULL ORDER BY ano, mes"
+        ).fetchall()
+
+    classificacoes = classificacoes_proposituras(proposituras_rows)
     estimativas, competencia_estimativa = _estimativas_por_vereador(remuneracao_rows, legislatura_atual_inicio)
 
     resumos = json.loads(RESUMOS_PATH.read_text(encoding="utf-8")) if RESUMOS_PATH.exists() else {}
@@ -188,14 +143,14 @@ def exportar():
 
     proposituras_json = []
     for p in proposituras_rows:
-        familia = FAMILIA_POR_TIPO.get(p["tipo"], "Outros")
-        categoria = categoria_de_ementa(p["ementa"])
+        classificacao = classificacoes[p["id"]]
+        familia, categoria = classificacao.familia, classificacao.categoria
         proposituras_json.append({
             "id": p["id"], "tipo": p["tipo"], "subtipo": p["subtipo"], "numero": p["numero"],
             "ano": p["ano"], "data": p["data"], "regime": p["regime"], "quorum": p["quorum"],
             "situacao": p["situacao"], "ementa": p["ementa"], "pdf_url": p["pdf_url"],
             "familia": familia, "familia_label": FAMILIA_LABEL.get(familia, familia),
-            "status": status_de_situacao(p["situacao"]),
+            "status": classificacao.status,
             "categoria": categoria, "categoria_cerimonial": categoria in CATEGORIAS_CERIMONIAIS,
             "autores": autores_por_propositura.get(p["id"], []),
         })
@@ -236,4 +191,16 @@ def exportar():
 
 
 if __name__ == "__main__":
-    exportar()
+    parser = argparse.ArgumentParser(description="Exporta o recorte da legislatura atual para site/data/*.json")
+    parser.add_argument(
+        "--profile",
+        choices=MODOS_PROFILE,
+        help="Perfila a exportação: cpu (cProfile) ou mem (tracemalloc), com arquivos em logs/",
+    )
+    args = parser.parse_args()
+    profiler.configurar(args.profile)
+    with profiler.etapa("export"):
+        exportar()
+    resumo_profile = profiler.resumo()
+    if resumo_profile:
+        print(resumo_profile)
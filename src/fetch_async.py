@@ -0,0 +1,90 @@
+"""Motor de coleta assíncrono (asyncio) - equivalentes de utils.fetch_soup/fetch_json que
+permitem várias requisições em voo ao mesmo tempo.
+
+A concorrência é limitada por um semáforo (`max_concurrency`) e o ritmo pelo mesmo token
+bucket por host do caminho síncrono (utils.bucket_do_host), então misturar chamadas
+síncronas e assíncronas nunca passa do orçamento de um host - orçamento que o controle
+adaptativo (utils.TaxaAdaptativa) sobe enquanto o servidor responde bem e derruba em 429/5xx.
+
+O GET em si continua sendo feito pela sessão `requests` compartilhada (keep-alive) e pelo
+cache em disco (http_cache), rodando em threads via asyncio.to_thread - junto com o parse do
+HTML, que assim também não trava o event loop. Respostas servidas direto do cache não
+consomem ficha do token bucket.
+
+Uso:
+    async def coletar():
+        fetcher = AsyncFetcher()
+        return await asyncio.gather(*(fetcher.fetch_soup(url, p) for p in params))
+
+    asyncio.run(coletar())
+"""
+
+import asyncio
+import logging
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .config import config
+from .metrics import metricas
+from .utils import (
+    _cache_fresco, _erro_retentavel, _parse_json, _parsear, _tempo_espera_retry, _tentativa, bucket_do_host,
+    make_soup,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncFetcher:
+    """Cria dentro do event loop que vai usá-lo (o semáforo pertence a esse loop)."""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max_concurrency or config.scraping.max_concurrency
+        self._semaforo = asyncio.Semaphore(self.max_concurrency)
+
+    async def _aguardar_rate_limit(self, url: str):
+        espera = bucket_do_host(url).reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    async def _fetch(self, url: str, params: Optional[dict],
+                     parse: Callable[[str], T]) -> Optional[T]:
+        cfg = config.scraping
+
+        texto = await asyncio.to_thread(_cache_fresco, url, params)
+        if texto is not None:
+            return await asyncio.to_thread(_parsear, parse, texto)
+
+        erro = None
+        for attempt in range(cfg.max_retries + 1):
+            async with self._semaforo:
+                await self._aguardar_rate_limit(url)
+                try:
+                    logger.debug(f"GET (async) {url} params={params} (tentativa {attempt + 1})")
+                    return await asyncio.to_thread(_tentativa, url, params, parse)
+                except (requests.RequestException, ValueError) as e:
+                    if not _erro_retentavel(e):
+                        logger.error(f"Erro permanente ao acessar {url}, sem nova tentativa: {e}")
+                        metricas.somar("falhas_http")
+                        return None
+                    logger.warning(f"Erro ao acessar {url} (tentativa {attempt + 1}): {e}")
+                    erro = e
+            # espera do retry fora do semáforo, para não segurar a vaga de outra requisição
+            if attempt < cfg.max_retries:
+                metricas.somar("retries")
+                await asyncio.sleep(_tempo_espera_retry(attempt, erro))
+
+        metricas.somar("falhas_http")
+        logger.error(f"Falha definitiva ao acessar {url} após {cfg.max_retries + 1} tentativas")
+        return None
+
+    async def fetch_soup(self, url: str, params: Optional[dict] = None,
+                         parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        return await self._fetch(url, params, partial(make_soup, parse_only=parse_only))
+
+    async def fetch_json(self, url: str, params: Optional[dict] = None) -> Optional[dict]:
+        return await self._fetch(url, params, _parse_json)
@@ -0,0 +1,139 @@
+"""Gravação e reprodução de respostas HTTP do site da Câmara, para rodar os scrapers
+offline (benchmarks de throughput e do comportamento de retry sem depender da rede).
+
+Gravar: `python -m src.main --record-fixtures DIR ...` salva em DIR cada resposta 200 que
+utils.fetch_soup/fetch_json recebe (o cache HTTP fica desligado durante a gravação, para
+que toda página passe pela rede e seja gravada).
+
+Reproduzir: um servidor HTTP local que responde com as páginas gravadas, com latência e
+erros 5xx injetáveis:
+
+    python -m src.fixtures DIR --port 8765 --latencia 0.3 --taxa-erro 0.1
+    python -m src.main --base-url http://127.0.0.1:8765 --no-cache
+
+Cada resposta é identificada pelo caminho + query string ordenada, então a paginação
+(CurrentPage=1, 2, ...) e os perfis (/Vereadores/Details?id=N) são reproduzidos
+exatamente como foram gravados. Uma página de /Siscam/Documentos que não foi gravada é
+respondida como página sem resultados - o mesmo sinal de fim de paginação do site real.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+PAGINA_SEM_RESULTADOS = b"<html><body><p>0 registros encontrados</p></body></html>"
+
+
+def fixture_key(path: str, query: Iterable[Tuple[str, str]]) -> str:
+    consulta = urlencode(sorted((str(k), str(v)) for k, v in query))
+    return hashlib.sha256(f"{path}?{consulta}".encode("utf-8")).hexdigest()[:32]
+
+
+def gravar_fixture(diretorio: str, url: str, params: Optional[dict], conteudo: bytes,
+                   content_type: Optional[str]):
+    destino = Path(diretorio)
+    destino.mkdir(parents=True, exist_ok=True)
+    path = urlsplit(url).path
+    chave = fixture_key(path, (params or {}).items())
+    (destino / f"{chave}.body").write_bytes(conteudo)
+    meta = {"path": path, "params": {str(k): str(v) for k, v in (params or {}).items()},
+            "content_type": content_type}
+    (destino / f"{chave}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o site real
+
+    diretorio: Path
+    latencia: float = 0.0
+    taxa_erro: float = 0.0
+    status_erro: int = 503
+    retry_after: Optional[int] = None
+    rng: random.Random
+    rng_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _responder(self, status: int, corpo: bytes = b"", content_type: str = "text/html; charset=utf-8",
+                   retry_after: Optional[int] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        with self.rng_lock:
+            sortear_erro = self.rng.random() < self.taxa_erro
+        if self.latencia:
+            time.sleep(self.latencia)
+        if sortear_erro:
+            self._responder(self.status_erro, b"Erro injetado", retry_after=self.retry_after)
+            return
+
+        partes = urlsplit(self.path)
+        query = parse_qsl(partes.query, keep_blank_values=True)
+        chave = fixture_key(partes.path, query)
+        corpo_path = self.diretorio / f"{chave}.body"
+        if corpo_path.exists():
+            meta = json.loads((self.diretorio / f"{chave}.json").read_text(encoding="utf-8"))
+            self._responder(200, corpo_path.read_bytes(), meta.get("content_type") or "text/html; charset=utf-8")
+        elif partes.path.endswith("/Siscam/Documentos") and dict(query).get("CurrentPage"):
+            self._responder(200, PAGINA_SEM_RESULTADOS)
+        else:
+            self._responder(404, b"Fixture nao gravada")
+
+
+def criar_servidor(diretorio: str, port: int = 8765, latencia: float = 0.0, taxa_erro: float = 0.0,
+                   status_erro: int = 503, seed: int = 0, retry_after: Optional[int] = None) -> ThreadingHTTPServer:
+    """Servidor de reprodução (ainda não iniciado - chamar serve_forever, possivelmente
+    numa thread, e shutdown no fim). port=0 escolhe uma porta livre. Com `retry_after`, os
+    erros injetados levam o header Retry-After (segundos)."""
+    handler = type("ReplayHandler", (_ReplayHandler,), {
+        "diretorio": Path(diretorio),
+        "latencia": latencia,
+        "taxa_erro": taxa_erro,
+        "status_erro": status_erro,
+        "retry_after": retry_after,
+        "rng": random.Random(seed),
+    })
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que reproduz respostas gravadas do site da Câmara")
+    parser.add_argument("diretorio", help="Diretório gravado com --record-fixtures")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de atraso por resposta")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração das respostas que vira erro (0-1)")
+    parser.add_argument("--status-erro", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After (s) enviado junto dos erros")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do sorteio de erros (reprodutível)")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.diretorio, args.port, args.latencia, args.taxa_erro, args.status_erro, args.seed,
+                              args.retry_after)
+    print(f"Reproduzindo {args.diretorio} em http://127.0.0.1:{servidor.server_address[1]} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
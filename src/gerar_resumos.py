@@ -20,15 +20,16 @@ Requer GEMINI_API_KEY no .env local (nunca commitar - já está no .gitignore).
 import hashlib
 import json
 import os
-import sqlite3
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from .config import CATEGORIAS_CERIMONIAIS, config
-from .export_json import _estimativas_por_vereador, categoria_de_ementa, status_de_situacao
+from .config import CATEGORIAS_CERIMONIAIS
+from .database import db_manager
+from .classificacao import classificacoes_proposituras
+from .export_json import _estimativas_por_vereador
 
 load_dotenv()
 
@@ -74,6 +75,7 @@ def _montar_fatos_por_vereador(conn, legislatura_atual_inicio):
     ).fetchall()
 
     proposituras_por_id = {p["id"]: p for p in proposituras_rows}
+    classificacoes = classificacoes_proposituras(proposituras_rows)
     props_por_vereador = {}
     for a in autores_rows:
         if a["propositura_id"] in proposituras_por_id:
@@ -88,21 +90,21 @@ def _montar_fatos_por_vereador(conn, legislatura_atual_inicio):
         contagem_categoria = {}
         contagem_tipo = {}
         for p in props:
-            cat = categoria_de_ementa(p["ementa"])
+            cat = classificacoes[p["id"]].categoria
             contagem_categoria[cat] = contagem_categoria.get(cat, 0) + 1
             contagem_tipo[p["tipo"]] = contagem_tipo.get(p["tipo"], 0) + 1
 
         normativos = [p for p in props if p["tipo"] == "Projeto de Lei"]
         status_normativos = {}
         for p in normativos:
-            s = status_de_situacao(p["situacao"])
+            s = classificacoes[p["id"]].status
             status_normativos[s] = status_normativos.get(s, 0) + 1
 
         pls_destaque = [
             {"numero": p["numero"], "ano": p["ano"], "ementa": p["ementa"]}
             for p in normativos
-            if status_de_situacao(p["situacao"]) == "Aprovado"
-            and categoria_de_ementa(p["ementa"]) not in CATEGORIAS_CERIMONIAIS
+            if classificacoes[p["id"]].status == "Aprovado"
+            and classificacoes[p["id"]].categoria not in CATEGORIAS_CERIMONIAIS
         ]
 
         estim = estimativas.get(v["id"])
@@ -159,6 +161,7 @@ def _hash_fatos(fatos):
 
 
 def gerar(forcar=False):
+    db_manager.create_tables()  # bancos antigos ainda sem a tabela de classificações
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         print("GEMINI_API_KEY não encontrada no ambiente/.env. Abortando.", file=sys.stderr)
@@ -168,13 +171,11 @@ def gerar(forcar=False):
     from google import genai
     client = genai.Client(api_key=api_key)
 
-    conn = sqlite3.connect(config.db_path)
-    conn.row_factory = sqlite3.Row
-    legislaturas_rows = conn.execute("SELECT * FROM legislaturas").fetchall()
-    legislatura_atual_inicio = max(r["data_inicio"] for r in legislaturas_rows if r["data_inicio"])
+    with db_manager.get_connection() as conn:
+        legislaturas_rows = conn.execute("SELECT * FROM legislaturas").fetchall()
+        legislatura_atual_inicio = max(r["data_inicio"] for r in legislaturas_rows if r["data_inicio"])
 
-    fatos_por_vereador = _montar_fatos_por_vereador(conn, legislatura_atual_inicio)
-    conn.close()
+        fatos_por_vereador = _montar_fatos_por_vereador(conn, legislatura_atual_inicio)
 
     existentes = json.loads(RESUMOS_PATH.read_text(encoding="utf-8")) if RESUMOS_PATH.exists() else {}
 
@@ -0,0 +1,209 @@
+"""Cache em disco das respostas HTTP do Siscam (usado por utils.fetch_soup/fetch_json).
+
+Layout, sob `config.http_cache_dir`:
+    index/<sha256(url+params)>.json   -> metadados da última resposta daquela URL
+    objetos/<sha256(corpo)>           -> corpo bruto, endereçado pelo conteúdo
+
+Como os corpos são endereçados pelo hash, páginas idênticas (ex.: o mesmo perfil visto
+em duas execuções) ocupam um único arquivo.
+
+Validade de uma entrada:
+- Se o servidor mandou ETag/Last-Modified, a entrada é sempre revalidada com um GET
+  condicional (If-None-Match/If-Modified-Since); um 304 reaproveita o corpo do disco.
+- Sem validadores, a entrada de uma página estática (caminho em `cache_ttl_paths`, ex.: o
+  perfil de um vereador) vale por `cache_ttl_seconds` sem ir à rede; depois disso a página é
+  baixada de novo e o hash do corpo diz se ela mudou. Listagens e a busca de documentos,
+  que mudam a qualquer momento, nunca são servidas pelo TTL.
+
+Quando uma entrada é sobrescrita com um corpo diferente, o objeto antigo é apagado se
+nenhuma outra entrada do índice apontar para ele.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EntradaCache:
+    url: str
+    corpo_hash: str
+    encoding: str
+    tamanho: int
+    salvo_em: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def tem_validadores(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def headers_condicionais(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, diretorio: str, ttl_seconds: float, ttl_paths: Iterable[str] = ()):
+        self.diretorio = Path(diretorio)
+        self.ttl_seconds = ttl_seconds
+        self.ttl_paths = frozenset(ttl_paths)
+        (self.diretorio / "index").mkdir(parents=True, exist_ok=True)
+        (self.diretorio / "objetos").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._referencias: Optional[Dict[str, int]] = None  # corpo_hash -> entradas do índice
+        self.stats = {"hits": 0, "revalidados": 0, "misses": 0, "inalterados": 0, "bytes_economizados": 0,
+                      "objetos_removidos": 0}
+
+    @staticmethod
+    def chave(url: str, params: Optional[dict]) -> str:
+        consulta = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return hashlib.sha256(f"{url}?{consulta}".encode("utf-8")).hexdigest()
+
+    def _caminho_index(self, chave: str) -> Path:
+        return self.diretorio / "index" / f"{chave}.json"
+
+    def _caminho_objeto(self, corpo_hash: str) -> Path:
+        return self.diretorio / "objetos" / corpo_hash
+
+    def _contar(self, **incrementos):
+        with self._lock:
+            for nome, valor in incrementos.items():
+                self.stats[nome] += valor
+
+    @staticmethod
+    def _ler_index(caminho: Path) -> Optional[EntradaCache]:
+        try:
+            return EntradaCache(**json.loads(caminho.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def buscar(self, url: str, params: Optional[dict]) -> Optional[EntradaCache]:
+        entrada = self._ler_index(self._caminho_index(self.chave(url, params)))
+        if entrada is None or not self._caminho_objeto(entrada.corpo_hash).exists():
+            return None
+        return entrada
+
+    def fresca(self, entrada: EntradaCache) -> bool:
+        """Pode ser usada sem ir à rede: só páginas estáticas (caminho em ttl_paths) sem
+        validadores, dentro do TTL."""
+        return (not entrada.tem_validadores and urlsplit(entrada.url).path in self.ttl_paths
+                and time.time() - entrada.salvo_em < self.ttl_seconds)
+
+    def ler_texto(self, entrada: EntradaCache) -> str:
+        conteudo = self._caminho_objeto(entrada.corpo_hash).read_bytes()
+        return conteudo.decode(entrada.encoding, errors="replace")
+
+    def hit(self, entrada: EntradaCache, revalidado: bool = False) -> str:
+        """Registra o reaproveitamento (direto ou via 304) e devolve o corpo do disco."""
+        if revalidado:
+            self._contar(revalidados=1, bytes_economizados=entrada.tamanho)
+        else:
+            self._contar(hits=1, bytes_economizados=entrada.tamanho)
+        return self.ler_texto(entrada)
+
+    def salvar(self, url: str, params: Optional[dict], response: requests.Response,
+               anterior: Optional[EntradaCache] = None) -> str:
+        """Grava uma resposta 200 baixada da rede e devolve o corpo decodificado."""
+        conteudo = response.content
+        encoding = response.encoding or response.apparent_encoding or "utf-8"
+        corpo_hash = hashlib.sha256(conteudo).hexdigest()
+
+        if anterior and anterior.corpo_hash == corpo_hash:
+            self._contar(misses=1, inalterados=1)
+        else:
+            self._contar(misses=1)
+
+        objeto = self._caminho_objeto(corpo_hash)
+        if not objeto.exists():
+            self._gravar_atomico(objeto, conteudo)
+
+        chave = self.chave(url, params)
+        substituida = self._ler_index(self._caminho_index(chave))
+        entrada = EntradaCache(
+            url=url,
+            corpo_hash=corpo_hash,
+            encoding=encoding,
+            tamanho=len(conteudo),
+            salvo_em=time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self._gravar_index(chave, entrada)
+        self._trocar_referencia(substituida.corpo_hash if substituida else None, corpo_hash)
+        return conteudo.decode(encoding, errors="replace")
+
+    def _contar_referencias(self) -> Dict[str, int]:
+        referencias: Dict[str, int] = {}
+        for caminho in (self.diretorio / "index").glob("*.json"):
+            entrada = self._ler_index(caminho)
+            if entrada:
+                referencias[entrada.corpo_hash] = referencias.get(entrada.corpo_hash, 0) + 1
+        return referencias
+
+    def _trocar_referencia(self, antigo: Optional[str], novo: str):
+        """Atualiza a contagem de entradas por objeto depois de gravar um índice e apaga o
+        objeto antigo se ele ficou órfão. A contagem é montada varrendo o índice na primeira
+        gravação do processo (que já inclui a entrada recém-gravada)."""
+        with self._lock:
+            if self._referencias is None:
+                self._referencias = self._contar_referencias()
+            else:
+                self._referencias[novo] = self._referencias.get(novo, 0) + 1
+                if antigo is not None:
+                    self._referencias[antigo] = self._referencias.get(antigo, 1) - 1
+            if antigo is None or antigo == novo or self._referencias.get(antigo, 0) > 0:
+                return
+            self._referencias.pop(antigo, None)
+            try:
+                self._caminho_objeto(antigo).unlink()
+                self.stats["objetos_removidos"] += 1
+            except FileNotFoundError:
+                pass
+
+    def _gravar_index(self, chave: str, entrada: EntradaCache):
+        conteudo = json.dumps(asdict(entrada), ensure_ascii=False).encode("utf-8")
+        self._gravar_atomico(self._caminho_index(chave), conteudo)
+
+    @staticmethod
+    def _gravar_atomico(caminho: Path, conteudo: bytes):
+        temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporario.write_bytes(conteudo)
+        os.replace(temporario, caminho)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Cache compartilhado do processo, ou None se `cache_enabled` estiver desligado."""
+    global _cache
+    cfg = config.scraping
+    if not cfg.cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(config.http_cache_dir, cfg.cache_ttl_seconds, cfg.cache_ttl_paths)
+        return _cache
+
+
+def estatisticas_cache() -> Dict[str, int]:
+    return dict(_cache.stats) if _cache is not None else {}
@@ -9,22 +9,43 @@ import time
 from .database import db_manager
 from .scraper_proposituras import scrape_proposituras
 from .scraper_vereadores import scrape_vereadores
-from .utils import setup_logging
+from .config import config
+from .http_cache import estatisticas_cache
+from .metrics import metricas, relatorio_metricas, salvar_metricas
+from .profiling import MODOS_PROFILE, profiler
+from .utils import estatisticas_conexoes, setup_logging, taxas_por_host
 
 logger = logging.getLogger(__name__)
 
 
-def run_vereadores():
+def _etapa_concluida(run_id: int, etapa: str) -> bool:
+    checkpoint = db_manager.checkpoint(run_id, etapa)
+    return bool(checkpoint and checkpoint.concluida)
+
+
+def run_vereadores(run_id: int):
+    if _etapa_concluida(run_id, "vereadores"):
+        logger.info("=== Vereadores: etapa já concluída nesta execução, pulando ===")
+        return
     logger.info("=== Coletando vereadores ===")
     inicio = time.time()
-    total = scrape_vereadores()
-    logger.info(f"Vereadores processados: {total} em {time.time() - inicio:.1f}s")
+    with metricas.etapa("vereadores"), profiler.etapa("vereadores"):
+        resultado = scrape_vereadores(run_id=run_id)
+    logger.info(
+        f"Vereadores processados: {resultado['total']} ({resultado['novos']} novos, "
+        f"{resultado['atualizados']} atualizados, {resultado['inalterados']} inalterados) "
+        f"em {time.time() - inicio:.1f}s"
+    )
 
 
-def run_proposituras():
-    logger.info("=== Coletando proposituras ===")
+def run_proposituras(run_id: int, incremental: bool = False):
+    if _etapa_concluida(run_id, "proposituras"):
+        logger.info("=== Proposituras: etapa já concluída nesta execução, pulando ===")
+        return
+    logger.info("=== Coletando proposituras" + (" (incremental)" if incremental else "") + " ===")
     inicio = time.time()
-    resultado = scrape_proposituras()
+    with metricas.etapa("proposituras"), profiler.etapa("proposituras"):
+        resultado = scrape_proposituras(incremental=incremental, run_id=run_id)
     logger.info(f"Proposituras: {resultado} em {time.time() - inicio:.1f}s")
 
 
@@ -49,37 +70,134 @@ def run_relatorio_final():
     for item in stats["proposituras_por_vereador"][:10]:
         logger.info(f"  {item['nome']}: {item['total']}")
 
+    conexoes = estatisticas_conexoes()
+    logger.info(
+        f"HTTP: {conexoes['requisicoes']} requisições, {conexoes['conexoes_novas']} conexões novas, "
+        f"{conexoes['conexoes_reaproveitadas']} reaproveitadas (keep-alive)"
+    )
+    for host, taxa in taxas_por_host().items():
+        logger.info(f"Taxa final de {host}: {taxa:.2f} req/s (inicial {config.scraping.requests_per_second:.2f})")
+
+    cache = estatisticas_cache()
+    if cache:
+        logger.info(
+            f"Cache HTTP: {cache['hits']} hits (TTL), {cache['revalidados']} revalidados (304), "
+            f"{cache['misses']} misses ({cache['inalterados']} com corpo inalterado), "
+            f"{cache['bytes_economizados'] / 1024:.0f} KiB não baixados, "
+            f"{cache['objetos_removidos']} corpos antigos apagados"
+        )
+
 
 def main():
     parser = argparse.ArgumentParser(description="Scraper da Câmara de Vereadores de Botucatu")
     parser.add_argument(
         "--mode",
-        choices=["vereadores", "proposituras", "full"],
+        choices=["vereadores", "proposituras", "full", "report"],
         default="full",
-        help="Modo de execução (default: full)",
+        help="Modo de execução (default: full). 'report' não coleta nada: mostra as métricas "
+             "das últimas execuções (ver --ultimas)",
     )
     parser.add_argument(
         "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
         default="INFO",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Proposituras: para depois de algumas páginas seguidas sem novidade, "
+             "em vez de paginar até data_inicio (o cache HTTP só é usado com revalidação)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignora o cache de respostas HTTP em disco (data/http_cache)",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="Coleta de outro endereço em vez do site oficial (ex.: servidor local de "
+             "`python -m src.fixtures`)",
+    )
+    parser.add_argument(
+        "--record-fixtures",
+        metavar="DIR",
+        help="Grava todas as respostas HTTP em DIR para reproduzir a coleta offline (desliga o cache)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retoma a última execução do mesmo modo que não terminou (falha ou interrupção), "
+             "a partir dos checkpoints de cada etapa",
+    )
+    parser.add_argument(
+        "--ultimas",
+        type=int,
+        default=10,
+        metavar="N",
+        help="--mode report: quantas execuções recentes comparar (default: 10)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=MODOS_PROFILE,
+        help="Perfila cada etapa: cpu (cProfile) ou mem (tracemalloc). Grava os arquivos em logs/ "
+             "e mostra o top de cada etapa no fim",
+    )
     args = parser.parse_args()
 
+    if args.no_cache:
+        config.scraping.cache_enabled = False
+    if args.incremental or args.resume:
+        # quem procura novidade não pode aceitar nem um perfil guardado sem ir à rede:
+        # tudo é revalidado (GET condicional) ou baixado de novo
+        config.scraping.cache_ttl_seconds = 0
+    if args.base_url:
+        config.scraping.base_url = args.base_url.rstrip("/")
+    if args.record_fixtures:
+        config.scraping.fixtures_record_dir = args.record_fixtures
+        config.scraping.cache_enabled = False
+
+    if args.profile:
+        profiler.configurar(args.profile)
+
     setup_logging(level=getattr(logging, args.log_level))
     db_manager.create_tables()
 
+    if args.mode == "report":
+        relatorio_metricas(args.ultimas)
+        db_manager.close()
+        return
+
+    run_id, retomada = db_manager.iniciar_execucao(args.mode, retomar=args.resume)
+    if retomada:
+        logger.info(f"Retomando a execução #{run_id}")
+    elif args.resume:
+        logger.info(f"Nenhuma execução '{args.mode}' pendente para retomar, iniciando a #{run_id}")
+
+    etapas = [e for e in ("vereadores", "proposituras") if args.mode in (e, "full")]
+    status = "falhou"
     try:
-        if args.mode in ("vereadores", "full"):
-            run_vereadores()
-        if args.mode in ("proposituras", "full"):
-            run_proposituras()
+        if "vereadores" in etapas:
+            run_vereadores(run_id)
+        if "proposituras" in etapas:
+            run_proposituras(run_id, incremental=args.incremental)
+        status = "concluido" if all(_etapa_concluida(run_id, e) for e in etapas) else "incompleto"
+        if status == "incompleto":
+            logger.warning(f"Execução #{run_id} incompleta - rode de novo com --resume para continuar")
         run_relatorio_final()
     except KeyboardInterrupt:
+        status = "interrompido"
         logger.info("Execução interrompida pelo usuário")
         sys.exit(1)
     except Exception as e:
         logger.exception(f"Erro fatal: {e}")
         sys.exit(1)
+    finally:
+        db_manager.finalizar_execucao(run_id, status)
+        salvar_metricas(run_id, args.mode, status)
+        resumo_profile = profiler.resumo()
+        if resumo_profile:
+            logger.info("\n" + resumo_profile)
+        db_manager.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""Métricas por etapa de cada execução do scraper: requisições, retries, bytes baixados,
+tempo de parse e de gravação, linhas novas/atualizadas/inalteradas e pico de memória.
+
+Quem coleta (utils, fetch_async, scrapers) só soma contadores em `metricas`; a etapa a que
+eles pertencem é definida por quem orquestra, com `metricas.etapa("proposituras")`. As
+etapas rodam uma de cada vez, então a etapa corrente vale para o processo inteiro - inclusive
+para as threads do pipeline e do asyncio.to_thread. O que é somado fora de qualquer etapa
+fica em "geral". Tempos de parse e gravação somam o de todas as threads, então podem
+passar da duração da etapa.
+
+No fim da execução, `salvar_metricas` grava tudo na tabela run_metrics e num JSON em logs/;
+`python -m src.main --mode report` mostra as últimas execuções lado a lado e avisa quando a
+última piorou em relação às anteriores.
+"""
+
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from .config import config
+from .database import db_manager
+
+try:
+    import resource
+except ImportError:  # Windows - sem pico de RSS
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Colunas do relatório: (métrica, título, divisor, casas decimais)
+COLUNAS_RELATORIO = [
+    ("duracao_s", "duração(s)", 1, 1),
+    ("requisicoes", "req", 1, 0),
+    ("retries", "retries", 1, 0),
+    ("falhas_http", "falhas", 1, 0),
+    ("bytes_baixados", "MiB", 1024 * 1024, 1),
+    ("tempo_parse_s", "parse(s)", 1, 1),
+    ("tempo_gravacao_s", "grav.(s)", 1, 1),
+    ("linhas_novas", "novas", 1, 0),
+    ("linhas_atualizadas", "atualiz.", 1, 0),
+    ("linhas_inalteradas", "inalt.", 1, 0),
+    ("linhas_gravadas", "gravadas", 1, 0),
+    ("pico_rss_mb", "RSS(MiB)", 1, 0),
+]
+
+# Métricas em que subir é piorar; a última execução é comparada com a mediana das anteriores
+METRICAS_DEGRADACAO = ("duracao_s", "retries", "falhas_http", "tempo_parse_s", "tempo_gravacao_s", "pico_rss_mb")
+LIMIAR_DEGRADACAO = 1.5
+
+
+def pico_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo até agora, em MiB (None onde não há `resource`)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KiB no Linux
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+class MetricasExecucao:
+    """Contadores da execução atual, agrupados por etapa. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._etapa = "geral"
+        self.por_etapa: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """Tudo que for somado dentro do bloco conta para a etapa `nome`. No fim registra a
+        duração e o pico de RSS do processo até ali (ru_maxrss não volta a baixar, então uma
+        etapa herda o pico das anteriores se ela própria não passar dele)."""
+        anterior = self._etapa
+        self._etapa = nome
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar("duracao_s", time.perf_counter() - inicio)
+            rss = pico_rss_mb()
+            if rss is not None:
+                self.definir("pico_rss_mb", rss)
+            self._etapa = anterior
+
+    def somar(self, metrica: str, valor: float = 1.0):
+        with self._lock:
+            contadores = self.por_etapa.setdefault(self._etapa, {})
+            contadores[metrica] = contadores.get(metrica, 0.0) + valor
+
+    def definir(self, metrica: str, valor: float):
+        with self._lock:
+            self.por_etapa.setdefault(self._etapa, {})[metrica] = valor
+
+    @contextmanager
+    def medir(self, metrica: str) -> Iterator[None]:
+        """Soma à `metrica` o tempo (s) gasto dentro do bloco."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar(metrica, time.perf_counter() - inicio)
+
+    def copia(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {etapa: dict(contadores) for etapa, contadores in self.por_etapa.items()}
+
+
+metricas = MetricasExecucao()
+
+
+def salvar_metricas(run_id: int, modo: str, status: str) -> Path:
+    """Grava as métricas desta execução na tabela run_metrics e em logs/metricas_*.json;
+    devolve o caminho do JSON."""
+    por_etapa = metricas.copia()
+    db_manager.salvar_metricas_execucao(run_id, por_etapa)
+
+    log_dir = Path(config.logs_dir)
+    log_dir.mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho = log_dir / f"metricas_{timestamp}_run{run_id}.json"
+    relatorio = {"run_id": run_id, "modo": modo, "status": status, "gerado_em": datetime.now().isoformat(),
+                 "etapas": por_etapa}
+    caminho.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info(f"Métricas da execução #{run_id} gravadas em {caminho}")
+    return caminho
+
+
+def _formatar(valor: Optional[float], divisor: float, casas: int) -> str:
+    return "-" if valor is None else f"{valor / divisor:.{casas}f}"
+
+
+def relatorio_metricas(ultimas: int = 10):
+    """Loga, etapa por etapa, as métricas das últimas `ultimas` execuções e as que pioraram
+    na mais recente (acima de LIMIAR_DEGRADACAO x a mediana das anteriores)."""
+    execucoes = db_manager.metricas_execucoes(ultimas)
+    if not execucoes:
+        logger.info("Nenhuma execução com métricas registradas ainda")
+        return
+
+    logger.info(f"=== Métricas das últimas {len(execucoes)} execuções ===")
+    etapas = sorted({etapa for execucao in execucoes for etapa in execucao["etapas"]})
+    for etapa in etapas:
+        linhas = [e for e in execucoes if etapa in e["etapas"]]
+        logger.info(f"Etapa {etapa}:")
+        cabecalho = f"  {'run':>5} {'início':<19} {'modo':<12} {'status':<12} " + " ".join(
+            f"{titulo:>10}" for _, titulo, _, _ in COLUNAS_RELATORIO
+        )
+        logger.info(cabecalho)
+        for execucao in linhas:
+            valores = execucao["etapas"][etapa]
+            logger.info(
+                f"  {'#' + str(execucao['run_id']):>5} {execucao['iniciado_em']:<19} {execucao['modo']:<12} "
+                f"{execucao['status']:<12} "
+                + " ".join(f"{_formatar(valores.get(m), d, c):>10}" for m, _, d, c in COLUNAS_RELATORIO)
+            )
+
+        if len(linhas) < 2:
+            continue
+        ultima = linhas[-1]["etapas"][etapa]
+        pioras = []
+        for metrica in METRICAS_DEGRADACAO:
+            # contador ausente = nunca foi somado nessa execução (ex.: nenhum retry)
+            referencia = statistics.median(e["etapas"][etapa].get(metrica, 0.0) for e in linhas[:-1])
+            valor = ultima.get(metrica, 0.0)
+            if valor > LIMIAR_DEGRADACAO * referencia and valor - referencia >= 1:
+                pioras.append(f"{metrica} {valor:.1f} (mediana anterior {referencia:.1f})")
+        if pioras:
+            logger.warning(f"  Degradação na execução #{linhas[-1]['run_id']}: " + ", ".join(pioras))
+        else:
+            logger.info(f"  Execução #{linhas[-1]['run_id']} dentro do normal das anteriores")
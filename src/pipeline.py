@@ -0,0 +1,209 @@
+"""Pipeline produtor/consumidor em threads: busca -> parse -> gravação.
+
+    itens --> [busca x N] --fila--> [parse x M] --fila--> gravação (thread que chamou)
+
+As filas entre as etapas são limitadas (`tamanho_fila`) e o total de itens em voo - já
+emitidos e ainda não gravados - também (`janela`): se a gravação ou o parse atrasam, a
+busca para de puxar itens novos em vez de acumular páginas na memória (backpressure).
+Assim o parse da página N acontece enquanto a página N+1 ainda está na rede.
+
+A gravação roda na thread que chamou executar_pipeline, um item por vez e na ordem
+original dos itens (um único escritor no banco, e cortes do tipo "parar na primeira página
+vazia" continuam valendo). `gravar` devolve False para encerrar o pipeline: os itens ainda
+em voo são descartados.
+
+Falha na busca (`buscar` devolve None ou levanta exceção) ou no parse chega à gravação como
+resultado None - quem grava decide se isso encerra o pipeline.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K")
+B = TypeVar("B")
+P = TypeVar("P")
+
+_FIM = object()
+_ESPERA_FILA = 0.1  # segundos entre verificações do sinal de parada enquanto espera numa fila
+
+
+@dataclass
+class EstatisticasEtapa:
+    workers: int
+    ocupado: float = 0.0  # soma do tempo em que os workers da etapa estavam trabalhando
+    itens: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def registrar(self, duracao: float):
+        with self._lock:
+            self.ocupado += duracao
+            self.itens += 1
+
+    def utilizacao(self, duracao_total: float) -> float:
+        """Fração do tempo disponível (workers x duração) que a etapa passou ocupada."""
+        if duracao_total <= 0:
+            return 0.0
+        return self.ocupado / (duracao_total * self.workers)
+
+
+@dataclass
+class EstatisticasPipeline:
+    etapas: Dict[str, EstatisticasEtapa]
+    duracao: float = 0.0
+    # profundidade das filas amostrada a cada item que chega à gravação
+    amostras_fila: Dict[str, list] = field(default_factory=lambda: {"busca->parse": [], "parse->gravação": []})
+
+    def resumo(self) -> str:
+        partes = [
+            f"{nome} {etapa.utilizacao(self.duracao):.0%} ocupada ({etapa.workers} worker(s), {etapa.itens} itens)"
+            for nome, etapa in self.etapas.items()
+        ]
+        for nome, amostras in self.amostras_fila.items():
+            if amostras:
+                partes.append(f"fila {nome} média {sum(amostras) / len(amostras):.1f} / máx {max(amostras)}")
+        return f"{self.duracao:.2f}s - " + ", ".join(partes)
+
+
+def executar_pipeline(
+    itens: Iterable[K],
+    buscar: Callable[[K], Optional[B]],
+    parsear: Callable[[K, B], P],
+    gravar: Callable[[K, Optional[P]], bool],
+    workers_busca: int,
+    workers_parse: int,
+    tamanho_fila: int,
+    janela: Optional[int] = None,
+    nome: str = "pipeline",
+    intervalo_log: float = 10.0,
+) -> EstatisticasPipeline:
+    """Roda o pipeline até `itens` acabar ou `gravar` devolver False. `janela` (default:
+    busca + 2 x fila) limita os itens em voo. A cada `intervalo_log` segundos registra no
+    log a profundidade das filas; no fim, a utilização de cada etapa."""
+    janela = janela or workers_busca + 2 * tamanho_fila
+    parar = threading.Event()
+    vagas = threading.Semaphore(janela)
+    fila_busca: "queue.Queue" = queue.Queue()  # limitada na prática pelas vagas da janela
+    fila_html: "queue.Queue" = queue.Queue(maxsize=tamanho_fila)
+    fila_parse: "queue.Queue" = queue.Queue(maxsize=tamanho_fila)
+    stats = EstatisticasPipeline(etapas={
+        "busca": EstatisticasEtapa(workers_busca),
+        "parse": EstatisticasEtapa(workers_parse),
+        "gravação": EstatisticasEtapa(1),
+    })
+    produzidos = {"total": None}
+
+    def _colocar(fila: queue.Queue, valor) -> bool:
+        while not parar.is_set():
+            try:
+                fila.put(valor, timeout=_ESPERA_FILA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _tirar(fila: queue.Queue):
+        while not parar.is_set():
+            try:
+                return fila.get(timeout=_ESPERA_FILA)
+            except queue.Empty:
+                continue
+        return _FIM
+
+    def _produtor():
+        seq = 0
+        for seq, item in enumerate(itens, start=1):
+            while not vagas.acquire(timeout=_ESPERA_FILA):
+                if parar.is_set():
+                    return
+            if parar.is_set():
+                return
+            fila_busca.put((seq - 1, item))
+        produzidos["total"] = seq
+
+    def _worker_busca():
+        while True:
+            tarefa = _tirar(fila_busca)
+            if tarefa is _FIM:
+                return
+            seq, item = tarefa
+            inicio = time.perf_counter()
+            try:
+                corpo = buscar(item)
+            except Exception:
+                logger.exception(f"{nome}: erro inesperado ao buscar {item}")
+                corpo = None
+            stats.etapas["busca"].registrar(time.perf_counter() - inicio)
+            if not _colocar(fila_html, (seq, item, corpo)):
+                return
+
+    def _worker_parse():
+        while True:
+            tarefa = _tirar(fila_html)
+            if tarefa is _FIM:
+                return
+            seq, item, corpo = tarefa
+            resultado = None
+            if corpo is not None:
+                inicio = time.perf_counter()
+                try:
+                    resultado = parsear(item, corpo)
+                except Exception:
+                    logger.exception(f"{nome}: erro ao parsear {item}")
+                stats.etapas["parse"].registrar(time.perf_counter() - inicio)
+            if not _colocar(fila_parse, (seq, item, resultado)):
+                return
+
+    threads = [threading.Thread(target=_produtor, name=f"{nome}-produtor", daemon=True)]
+    threads += [threading.Thread(target=_worker_busca, name=f"{nome}-busca-{i}", daemon=True)
+                for i in range(workers_busca)]
+    threads += [threading.Thread(target=_worker_parse, name=f"{nome}-parse-{i}", daemon=True)
+                for i in range(workers_parse)]
+
+    inicio = time.perf_counter()
+    ultimo_log = inicio
+    for thread in threads:
+        thread.start()
+
+    fora_de_ordem: Dict[int, tuple] = {}
+    proximo = 0
+    try:
+        while produzidos["total"] is None or proximo < produzidos["total"]:
+            agora = time.perf_counter()
+            if agora - ultimo_log >= intervalo_log:
+                ultimo_log = agora
+                logger.info(
+                    f"{nome}: {proximo} itens gravados, filas busca->parse {fila_html.qsize()}/{tamanho_fila}, "
+                    f"parse->gravação {fila_parse.qsize()}/{tamanho_fila}, {len(fora_de_ordem)} fora de ordem"
+                )
+            try:
+                seq, item, resultado = fila_parse.get(timeout=_ESPERA_FILA)
+            except queue.Empty:
+                continue
+            stats.amostras_fila["busca->parse"].append(fila_html.qsize())
+            stats.amostras_fila["parse->gravação"].append(fila_parse.qsize())
+            fora_de_ordem[seq] = (item, resultado)
+
+            continuar = True
+            while continuar and proximo in fora_de_ordem:
+                item, resultado = fora_de_ordem.pop(proximo)
+                proximo += 1
+                inicio_gravacao = time.perf_counter()
+                continuar = gravar(item, resultado)
+                stats.etapas["gravação"].registrar(time.perf_counter() - inicio_gravacao)
+                vagas.release()
+            if not continuar:
+                break
+    finally:
+        parar.set()
+        for thread in threads:
+            thread.join()
+        stats.duracao = time.perf_counter() - inicio
+
+    logger.info(f"{nome}: {stats.resumo()}")
+    return stats
@@ -0,0 +1,129 @@
+"""Profiling opcional por etapa (`--profile cpu|mem` em src.main e src.export_json).
+
+- cpu: cProfile. O cProfile só enxerga a thread em que foi ligado, então as threads criadas
+  durante a etapa (pipeline, asyncio.to_thread) ganham um profiler próprio via
+  threading.setprofile e tudo é somado num único .pstats por etapa.
+- mem: tracemalloc (que já vale para todas as threads). Grava o snapshot do fim da etapa
+  e registra o pico de memória alocada por Python durante ela.
+
+Os arquivos vão para logs/ (profile_<timestamp>_<etapa>.pstats / .tracemalloc) e podem ser
+abertos depois com `python -m pstats` ou tracemalloc.Snapshot.load; `resumo()` traz as
+funções mais pesadas e os pontos que mais alocam de cada etapa, para o fim da execução.
+Sem modo configurado, `etapa()` não faz nada.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+MODOS_PROFILE = ("cpu", "mem")
+PROFUNDIDADE_TRACEMALLOC = 10  # frames guardados por alocação
+
+
+class Profiler:
+    def __init__(self, modo: Optional[str] = None, top: int = 15):
+        self.top = top
+        self.configurar(modo)
+
+    def configurar(self, modo: Optional[str]):
+        if modo not in (None, *MODOS_PROFILE):
+            raise ValueError(f"Modo de profiling desconhecido: {modo}")
+        self.modo = modo
+        self._timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._resultados: List[Tuple[str, str]] = []  # (etapa, texto do top N)
+
+    def _caminho(self, etapa: str, extensao: str) -> Path:
+        log_dir = Path(config.logs_dir)
+        log_dir.mkdir(exist_ok=True)
+        return log_dir / f"profile_{self._timestamp}_{etapa}.{extensao}"
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        if self.modo == "cpu":
+            with self._cpu(nome):
+                yield
+        elif self.modo == "mem":
+            with self._mem(nome):
+                yield
+        else:
+            yield
+
+    @contextmanager
+    def _cpu(self, nome: str) -> Iterator[None]:
+        principal = cProfile.Profile()
+        das_threads: List[cProfile.Profile] = []
+        lock = threading.Lock()
+
+        def _ligar_na_thread(*_):
+            # chamado no primeiro evento de cada thread nova; o profiler substitui este gancho
+            perfil = cProfile.Profile()
+            with lock:
+                das_threads.append(perfil)
+            perfil.enable()
+
+        threading.setprofile(_ligar_na_thread)
+        principal.enable()
+        try:
+            yield
+        finally:
+            principal.disable()
+            threading.setprofile(None)
+            stats = pstats.Stats(principal)
+            with lock:
+                for perfil in das_threads:
+                    stats.add(perfil)
+            caminho = self._caminho(nome, "pstats")
+            stats.dump_stats(caminho)
+
+            saida = io.StringIO()
+            stats.stream = saida
+            stats.sort_stats("tottime").print_stats(self.top)
+            self._resultados.append((nome, f"{caminho}\n{saida.getvalue().strip()}"))
+
+    @contextmanager
+    def _mem(self, nome: str) -> Iterator[None]:
+        ja_ativo = tracemalloc.is_tracing()
+        if not ja_ativo:
+            tracemalloc.start(PROFUNDIDADE_TRACEMALLOC)
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+            if not ja_ativo:
+                tracemalloc.stop()
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+            ])
+            caminho = self._caminho(nome, "tracemalloc")
+            snapshot.dump(str(caminho))
+
+            linhas = [f"{caminho}", f"Pico alocado durante a etapa: {pico / 1024 / 1024:.1f} MiB",
+                      "Maiores alocações ainda vivas no fim da etapa:"]
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                linhas.append(f"  {stat.size / 1024:9.1f} KiB  {stat.count:7d} blocos  {stat.traceback[0]}")
+            self._resultados.append((nome, "\n".join(linhas)))
+
+    def resumo(self) -> str:
+        """Texto com o top de cada etapa perfilada (vazio se nada foi perfilado)."""
+        if not self._resultados:
+            return ""
+        titulo = "funções mais pesadas (tottime)" if self.modo == "cpu" else "pontos de alocação"
+        return "\n\n".join(f"=== Profiling {self.modo} - {etapa}: {titulo} ===\n{texto}"
+                           for etapa, texto in self._resultados)
+
+
+profiler = Profiler()
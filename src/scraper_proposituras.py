@@ -1,11 +1,18 @@
+import itertools
 import logging
+import math
 import re
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
+from bs4 import SoupStrainer
+
 from .config import config
 from .database import PropositutaInfo, db_manager
-from .utils import clean_text, extract_id_from_href, fetch_soup, parse_date_br
+from .metrics import metricas
+from .pipeline import executar_pipeline
+from .utils import clean_text, extract_id_from_href, fetch_soup, fetch_text, make_soup, parse_date_br
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +20,35 @@ _TITULO_RE = re.compile(r"^(.*?)\s*N[ºo]\s*(\d+)\s*/\s*(\d{4})\s*$", re.IGNOREC
 _NOME_APELIDO_RE = re.compile(r"^(.*?)\s*\(([^)]+)\)\s*$")
 _TOTAL_REGISTROS_RE = re.compile(r"([\d.]+)\s*registros encontrados", re.IGNORECASE)
 
+# Com config.scraping.parse_so_itens, da página 2 em diante só os itens da lista viram
+# árvore - o resto (menu, filtros, rodapé) é descartado no parse. A página 1 continua
+# completa por causa do total de registros.
+# Regex em vez de class_="data-list-item": durante o parse o strainer vê o atributo class
+# como texto bruto ("data-list-item card mb-3"), não como lista de classes.
+ITENS_STRAINER = SoupStrainer("div", class_=re.compile(r"(^|\s)data-list-item(\s|$)"))
+
+
+_PDF_HREF_RE = re.compile(r"handler=Arquivo")
+
 
-def _valor_apos_label(container, label: str) -> Optional[str]:
-    """Busca um <p><strong>Label:</strong> valor</p> dentro do container e retorna 'valor'."""
-    label_normalizado = label.rstrip(": ").strip().lower()
+def _campos_por_label(container) -> Dict[str, str]:
+    """Lê de uma vez todos os <p><strong>Label:</strong> valor</p> do container e devolve
+    {label normalizado: valor} (ex.: {"data": "01/02/2025", "situação": "APROVADO"}).
+
+    Um único percurso por item, em vez de varrer todos os <p> de novo para cada campo.
+    Se um label se repetir no mesmo item, vale a primeira ocorrência."""
+    campos = {}
     for p in container.find_all("p"):
         strong = p.find("strong")
         if not strong:
             continue
         strong_text = clean_text(strong.get_text())
-        if strong_text.rstrip(": ").strip().lower() != label_normalizado:
+        label = strong_text.rstrip(": ").strip().lower()
+        if label in campos:
             continue
         full_text = clean_text(p.get_text())
-        return full_text[len(strong_text):].strip(" :")
-    return None
+        campos[label] = full_text[len(strong_text):].strip(" :")
+    return campos
 
 
 _AUTOR_COLETIVO_RE = re.compile(r"^Mesa\b", re.IGNORECASE)
@@ -73,90 +95,209 @@ def parse_documento_item(item) -> Optional[PropositutaInfo]:
         logger.warning(f"Não foi possível separar tipo/número/ano do título: '{titulo_texto}' (id={doc_id})")
         tipo, numero, ano = titulo_texto, None, None
 
-    data_texto = _valor_apos_label(item, "Data:")
-    data = parse_date_br(data_texto)
+    campos = _campos_por_label(item)
+    data = parse_date_br(campos.get("data"))
 
-    pdf_link = item.find("a", href=re.compile(r"handler=Arquivo"))
+    pdf_link = item.find("a", href=_PDF_HREF_RE)
     pdf_url = urljoin(config.scraping.base_url, pdf_link.get("href")) if pdf_link else None
 
     # O site usa "Autoria:" quando há coautoria e "Autor:" (singular) quando há um único autor
-    autoria_texto = _valor_apos_label(item, "Autoria:") or _valor_apos_label(item, "Autor:")
+    autoria_texto = campos.get("autoria") or campos.get("autor")
 
     return PropositutaInfo(
         id=doc_id,
         tipo=tipo,
-        subtipo=_valor_apos_label(item, "Subtipo:"),
+        subtipo=campos.get("subtipo"),
         numero=numero,
         ano=ano,
         data=data,
-        regime=_valor_apos_label(item, "Regime:"),
-        quorum=_valor_apos_label(item, "Quórum:"),
-        situacao=_valor_apos_label(item, "Situação:"),
-        ementa=_valor_apos_label(item, "Ementa:"),
+        regime=campos.get("regime"),
+        quorum=campos.get("quórum"),
+        situacao=campos.get("situação"),
+        ementa=campos.get("ementa"),
         pdf_url=pdf_url,
         autores=_split_autores(autoria_texto),
     )
 
 
-def _log_total_registros(soup):
+def _total_registros(soup) -> Optional[int]:
+    """Lê o "N registros encontrados" que o Siscam mostra no topo da busca."""
     texto = soup.get_text()
     match = _TOTAL_REGISTROS_RE.search(texto)
-    if match:
-        logger.info(f"Site reporta {match.group(1)} registros encontrados para os filtros aplicados")
+    if not match:
+        return None
+    logger.info(f"Site reporta {match.group(1)} registros encontrados para os filtros aplicados")
+    return int(match.group(1).replace(".", ""))
 
 
-def scrape_proposituras() -> dict:
-    """Pagina /Siscam/Documentos (Proposituras, autoria de Vereadores), ordenado por data
-    decrescente, parando assim que a data cruzar `config.scraping.data_inicio`."""
+def _params_pagina(pagina: int) -> dict:
     cfg = config.scraping
-    pagina = 1
-    total_processadas = 0
-
-    while True:
-        soup = fetch_soup(cfg.documentos_url, params={
-            "GrupoId": cfg.grupo_id_proposituras,
-            "Pesquisa": "Avancada",
-            "ShowSearch": "true",
-            "TipoAutorId": cfg.tipo_autor_vereadores,
-            "ItemsPerPage": cfg.items_per_page,
-            "Ordenacao": cfg.ordenacao_data_decrescente,
-            "CurrentPage": pagina,
-        })
-        if not soup:
-            logger.error(f"Falha ao buscar página {pagina} de proposituras, interrompendo")
-            break
+    return {
+        "GrupoId": cfg.grupo_id_proposituras,
+        "Pesquisa": "Avancada",
+        "ShowSearch": "true",
+        "TipoAutorId": cfg.tipo_autor_vereadores,
+        "ItemsPerPage": cfg.items_per_page,
+        "Ordenacao": cfg.ordenacao_data_decrescente,
+        "CurrentPage": pagina,
+    }
 
-        if pagina == 1:
-            _log_total_registros(soup)
 
-        itens = soup.find_all("div", class_="data-list-item")
-        if not itens:
-            logger.info(f"Página {pagina} sem resultados, fim da paginação")
-            break
+def _buscar_pagina(pagina: int) -> Optional[str]:
+    return fetch_text(config.scraping.documentos_url, params=_params_pagina(pagina))
 
-        cortou_por_data = False
-        for item in itens:
-            info = parse_documento_item(item)
-            if info is None:
-                logger.warning("Item de propositura não pôde ser parseado, ignorando")
-                continue
 
-            if info.data and info.data < cfg.data_inicio:
-                cortou_por_data = True
-                break  # ordenado por data decrescente: todo o restante é ainda mais antigo
+def _parse_itens(itens) -> Tuple[List[PropositutaInfo], bool]:
+    """Converte os itens de uma página de resultados. Retorna (proposituras, cortou_por_data)."""
+    cfg = config.scraping
+    infos = []
+    for item in itens:
+        info = parse_documento_item(item)
+        if info is None:
+            logger.warning("Item de propositura não pôde ser parseado, ignorando")
+            continue
+
+        if info.data and info.data < cfg.data_inicio:
+            return infos, True  # ordenado por data decrescente: todo o restante é ainda mais antigo
+        infos.append(info)
+    return infos, False
 
-            db_manager.upsert_propositura(info)
-            for nome, apelido in info.autores:
-                vereador_id = db_manager.get_or_create_vereador_by_nome(nome, apelido)
-                db_manager.link_autor(info.id, vereador_id)
-            total_processadas += 1
 
-        logger.info(f"Página {pagina}: {len(itens)} itens processados, total acumulado {total_processadas}")
+# Resultado do parse de uma página: (nº de itens na página, proposituras, cortou_por_data)
+PaginaParseada = Tuple[int, List[PropositutaInfo], bool]
+
+
+def _parsear_pagina(pagina: int, html: str) -> PaginaParseada:
+    strainer = ITENS_STRAINER if config.scraping.parse_so_itens else None
+    itens = make_soup(html, parse_only=strainer).find_all("div", class_="data-list-item")
+    infos, cortou_por_data = _parse_itens(itens)
+    return len(itens), infos, cortou_por_data
+
+
+class _GravadorPaginas:
+    """Etapa de gravação do pipeline: recebe as páginas em ordem, grava, atualiza o
+    checkpoint e decide quando a paginação termina (devolvendo False)."""
+
+    def __init__(self, incremental: bool, run_id: Optional[int]):
+        self.incremental = incremental
+        self.run_id = run_id
+        self.total_processadas = 0
+        self.linhas_gravadas = 0
+        self.tempo_gravacao = 0.0
+        self.paginas_inalteradas = 0
+        self.ultima_pagina = 0
+        self.falhou = False
+
+    def __call__(self, pagina: int, resultado: Optional[PaginaParseada]) -> bool:
+        cfg = config.scraping
+        if resultado is None:
+            logger.error(f"Falha ao buscar página {pagina} de proposituras, interrompendo")
+            self.falhou = True
+            return False
+
+        total_itens, infos, cortou_por_data = resultado
+        if not total_itens:
+            logger.info(f"Página {pagina} sem resultados, fim da paginação")
+            return False
+
+        existentes, inalteradas = db_manager.estado_proposituras(infos)
+        metricas.somar("linhas_novas", len(infos) - len(existentes))
+        metricas.somar("linhas_atualizadas", len(existentes) - len(inalteradas))
+        metricas.somar("linhas_inalteradas", len(inalteradas))
+        if self.incremental:
+            self.paginas_inalteradas = self.paginas_inalteradas + 1 if infos and len(inalteradas) == len(infos) else 0
+
+        inicio_gravacao = time.perf_counter()
+        with db_manager.get_connection():
+            self.linhas_gravadas += db_manager.upsert_proposituras_lote(infos)
+            if self.run_id:
+                db_manager.salvar_checkpoint(self.run_id, "proposituras", {"ultima_pagina": pagina})
+        self.tempo_gravacao += time.perf_counter() - inicio_gravacao
+        self.ultima_pagina = pagina
+        self.total_processadas += len(infos)
+        logger.info(f"Página {pagina}: {total_itens} itens processados, total acumulado {self.total_processadas}")
 
         if cortou_por_data:
             logger.info(f"Corte de data ({cfg.data_inicio.isoformat()}) atingido, parando paginação")
-            break
+            return False
 
-        pagina += 1
+        if self.incremental and self.paginas_inalteradas >= cfg.incremental_paginas_inalteradas:
+            logger.info(
+                f"Modo incremental: {self.paginas_inalteradas} páginas seguidas sem novidade, parando paginação"
+            )
+            return False
+        return True
 
-    return {"total_proposituras": total_processadas, "paginas_lidas": pagina}
+
+def scrape_proposituras(incremental: bool = False, run_id: Optional[int] = None) -> dict:
+    """Pagina /Siscam/Documentos (Proposituras, autoria de Vereadores), ordenado por data
+    decrescente, parando assim que a data cruzar `config.scraping.data_inicio`.
+
+    A página 1 é lida sozinha para descobrir o total de registros; as seguintes passam por
+    um pipeline (pipeline.py): `max_concurrency` threads buscando o HTML, `parse_workers`
+    parseando e uma única gravação, em ordem de página - então o corte por data funciona
+    igual ao da paginação sequencial, e as páginas já em voo além do corte são descartadas.
+    O parse da página N se sobrepõe à busca das seguintes.
+
+    Com `incremental=True`, a paginação também para depois de
+    `incremental_paginas_inalteradas` páginas seguidas em que todos os itens já estão no
+    banco com a mesma situação e ementa: como a busca vem da mais nova para a mais antiga,
+    daí pra trás não há nada novo. As páginas inalteradas funcionam como margem de
+    segurança (ex.: uma propositura antiga cuja situação mudou ainda aparece nelas).
+
+    Com `run_id`, a última página gravada fica no checkpoint "proposituras" da execução (na
+    mesma transação da página) e, se a execução está sendo retomada, a paginação continua
+    da página seguinte. Propositura nova publicada no meio-tempo só empurra itens para
+    páginas posteriores - no pior caso alguns são regravados, nunca pulados. A etapa só é
+    marcada como concluída se a paginação terminar sem falha."""
+    cfg = config.scraping
+    janela = None
+    if incremental:
+        # não adianta ter em voo mais páginas do que as necessárias para o critério de parada
+        janela = max(1, cfg.incremental_paginas_inalteradas)
+
+    checkpoint = db_manager.checkpoint(run_id, "proposituras") if run_id else None
+    retomar_de = checkpoint.progresso.get("ultima_pagina", 0) if checkpoint else 0
+    if retomar_de:
+        logger.info(f"Retomando proposituras a partir da página {retomar_de + 1}")
+
+    primeira = fetch_soup(cfg.documentos_url, params=_params_pagina(1))
+    if not primeira:
+        logger.error("Falha ao buscar página 1 de proposituras, interrompendo")
+        return {"total_proposituras": 0, "paginas_lidas": 0}
+
+    total_registros = _total_registros(primeira)
+    total_paginas = math.ceil(total_registros / cfg.items_per_page) if total_registros else None
+    if total_paginas:
+        logger.info(f"{total_paginas} páginas de {cfg.items_per_page} itens")
+
+    gravador = _GravadorPaginas(incremental, run_id)
+    gravador.ultima_pagina = retomar_de
+    continuar = True
+    if not retomar_de:
+        itens = primeira.find_all("div", class_="data-list-item")
+        continuar = gravador(1, (len(itens), *_parse_itens(itens)))
+
+    proxima = max(2, retomar_de + 1)
+    if continuar and (total_paginas is None or proxima <= total_paginas):
+        paginas = range(proxima, total_paginas + 1) if total_paginas else itertools.count(proxima)
+        stats = executar_pipeline(
+            paginas, _buscar_pagina, _parsear_pagina, gravador,
+            workers_busca=cfg.max_concurrency,
+            workers_parse=cfg.parse_workers,
+            tamanho_fila=cfg.pipeline_queue_size,
+            janela=janela,
+            nome="proposituras",
+        )
+        metricas.somar("tempo_parse_s", stats.etapas["parse"].ocupado)
+
+    if run_id and not gravador.falhou:
+        db_manager.salvar_checkpoint(run_id, "proposituras", {"ultima_pagina": gravador.ultima_pagina},
+                                     concluida=True)
+    metricas.somar("tempo_gravacao_s", gravador.tempo_gravacao)
+    if gravador.tempo_gravacao:
+        logger.info(
+            f"Gravação: {gravador.linhas_gravadas} linhas em {gravador.tempo_gravacao:.2f}s "
+            f"({gravador.linhas_gravadas / gravador.tempo_gravacao:.0f} linhas/s)"
+        )
+    return {"total_proposituras": gravador.total_processadas, "paginas_lidas": gravador.ultima_pagina}
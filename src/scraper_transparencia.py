@@ -9,16 +9,26 @@ vereadores).
 
 Estratégia por mês/ano: define o exercício e o mês na UI, clica "Pesquisar" e usa o botão
 de exportar CSV do próprio portal (mais robusto que raspar a tabela paginada renderizada).
+Cada mês roda num contexto novo do navegador; com --workers N, N navegadores dividem os meses.
 """
 
+import argparse
 import csv
+import hashlib
 import io
 import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import date
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 
-from playwright.sync_api import Frame, Page, sync_playwright
+from playwright.sync_api import APIResponse, Browser, Error as PlaywrightError, Frame, Page, Response, Route, sync_playwright
 
 from .database import RemuneracaoInfo, db_manager
+from .metrics import metricas, salvar_metricas
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +39,27 @@ TIMEOUT_MS = 20000
 # do CSV é o quadro de servidores administrativos da Secretaria da Câmara.
 UNIDADE_ALVO = "CORPO LEGISLATIVO"
 
+# Recursos que o navegador nem chega a baixar: nada deles é usado pelo scraper, e sem eles o
+# "networkidle" de cada navegação chega bem antes. Folhas de estilo ficam de fora da lista:
+# as esperas por visibilidade (botões, overlay "Processando") dependem do CSS do DevExpress.
+RECURSOS_BLOQUEADOS = {"image", "font", "media"}
+
+
+def _bloquear_recursos(route: Route):
+    if route.request.resource_type in RECURSOS_BLOQUEADOS:
+        route.abort()
+    else:
+        route.continue_()
+
+
+@contextmanager
+def _medir(tempos: Dict[str, float], etapa: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = tempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
 
 def _frame(page: Page) -> Frame:
     fr = page.frame(name="frmPaginaAspx")
@@ -95,12 +126,46 @@ def _pesquisar_mes(page: Page, mes: int) -> Frame:
     return fr
 
 
+def _eh_resposta_csv(response: Union[Response, APIResponse]) -> bool:
+    disposicao = (response.headers.get("content-disposition") or "").lower()
+    tipo = (response.headers.get("content-type") or "").lower()
+    return "attachment" in disposicao or "csv" in tipo
+
+
 def _exportar_csv(page: Page, fr: Frame) -> bytes:
-    with page.expect_download(timeout=TIMEOUT_MS) as dl_info:
-        fr.locator("#btnExportarCSV").click(force=True)
-    caminho = dl_info.value.path()
-    with open(caminho, "rb") as f:
-        return f.read()
+    """Clica em exportar e devolve o CSV em memória. O export é um POST do frame cuja
+    resposta vira download - e o Chromium não expõe o corpo de downloads. Por isso os POSTs
+    são interceptados no contexto: route.fetch() faz a requisição (com os cookies do
+    contexto), o corpo é lido do APIResponse e a mesma resposta segue para a página.
+
+    Enquanto esse caminho não for confirmado no portal real, o download continua sendo
+    esperado (expect_download) e o arquivo dele é lido se a interceptação não pegar o CSV."""
+    corpos: List[bytes] = []
+
+    def _interceptar_post(route: Route):
+        if route.request.method != "POST":
+            route.fallback()  # segue para _bloquear_recursos
+            return
+        try:
+            resposta = route.fetch()
+        except PlaywrightError as e:
+            logger.debug(f"Interceptação do POST falhou, seguindo sem ela: {e}")
+            route.fallback()
+            return
+        if _eh_resposta_csv(resposta):
+            corpos.append(resposta.body())
+        route.fulfill(response=resposta)
+
+    page.context.route("**/*", _interceptar_post)
+    try:
+        with page.expect_download(timeout=TIMEOUT_MS) as download_info:
+            fr.locator("#btnExportarCSV").click(force=True)
+    finally:
+        page.context.unroute("**/*", _interceptar_post)
+    if corpos:
+        return corpos[0]
+    logger.warning("CSV não capturado na interceptação do POST, lendo o arquivo do download")
+    return Path(download_info.value.path()).read_bytes()
 
 
 def _parse_valor(texto: str):
@@ -113,14 +178,14 @@ def _parse_valor(texto: str):
         return None
 
 
-def _parse_csv(conteudo: bytes, ano: int, mes: int):
-    texto = conteudo.decode("latin-1")
-    leitor = csv.DictReader(io.StringIO(texto), delimiter=";")
-    registros = []
-    for linha in leitor:
+def _iterar_csv(fluxo: BinaryIO, ano: int, mes: int) -> Iterator[RemuneracaoInfo]:
+    """Lê o CSV exportado linha a linha direto do fluxo de bytes (sem decodificar o arquivo
+    inteiro numa string) e produz só os registros do CORPO LEGISLATIVO."""
+    texto = io.TextIOWrapper(fluxo, encoding="latin-1", newline="")
+    for linha in csv.DictReader(texto, delimiter=";"):
         if (linha.get("Unidade") or "").strip().upper() != UNIDADE_ALVO:
             continue
-        registros.append(RemuneracaoInfo(
+        yield RemuneracaoInfo(
             nome_portal=(linha.get("Nome") or "").strip(),
             cargo=(linha.get("Cargo") or "").strip() or None,
             ano=ano,
@@ -130,58 +195,233 @@ def _parse_csv(conteudo: bytes, ano: int, mes: int):
             data_admissao=(linha.get("Data Admissão") or "").strip() or None,
             data_desligamento=(linha.get("Data Desligamento") or "").strip() or None,
             unidade=(linha.get("Unidade") or "").strip(),
-        ))
-    return registros
+        )
+
+
+def _coletar_mes(browser: Browser, ano: int, mes: int, tempos: Dict[str, float]) -> bytes:
+    """Baixa o CSV de um (ano, mês) num contexto novo do navegador - cookies, sessão ASP.NET
+    e estado do frame não passam de um mês para outro. `tempos` recebe a duração de cada
+    passo (navegar, exercicio, pesquisar, exportar).
+
+    Navegar do zero a cada mês (em vez de reaproveitar a página) é mais lento, mas
+    evidenciou-se muito mais confiável: reaproveitar o estado entre pesquisas sucessivas
+    corrompia o botão de exportar em meses seguintes. Ver ROADMAP.md."""
+    context = browser.new_context(ignore_https_errors=True, accept_downloads=True)
+    try:
+        context.route("**/*", _bloquear_recursos)
+        page = context.new_page()
+        with _medir(tempos, "navegar"):
+            _navegar_para_servidores(page)
+        if ano != date.today().year:
+            with _medir(tempos, "exercicio"):
+                _selecionar_exercicio(page, ano)
+        with _medir(tempos, "pesquisar"):
+            fr = _pesquisar_mes(page, mes)
+        with _medir(tempos, "exportar"):
+            return _exportar_csv(page, fr)
+    finally:
+        context.close()
+
+
+_WORKER_FIM = object()
+
+
+def _worker_navegador(jobs: "queue.Queue[Tuple[int, int]]", resultados: queue.Queue):
+    """Um navegador por thread (a API síncrona do Playwright não pode ser compartilhada entre
+    threads), consumindo (ano, mês) da fila até ela esvaziar. Cada resultado vai para
+    `resultados` como (ano, mês, csv, tempos por passo, erro); no fim, _WORKER_FIM."""
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            try:
+                while True:
+                    try:
+                        ano, mes = jobs.get_nowait()
+                    except queue.Empty:
+                        return
+                    tempos: Dict[str, float] = {}
+                    try:
+                        resultados.put((ano, mes, _coletar_mes(browser, ano, mes, tempos), tempos, None))
+                    except Exception as e:
+                        resultados.put((ano, mes, None, tempos, e))
+            finally:
+                browser.close()
+    except Exception:
+        logger.exception("Worker do navegador encerrado por erro")
+    finally:
+        resultados.put(_WORKER_FIM)
+
 
+def _meses_do_periodo(ano_inicio: int, ano_fim: int) -> List[Tuple[int, int]]:
+    meses = []
+    for ano in range(ano_inicio, ano_fim + 1):
+        ultimo_mes = date.today().month if ano == date.today().year else 12
+        meses.extend((ano, mes) for mes in range(1, ultimo_mes + 1))
+    return meses
 
-def scrape_remuneracao(ano_inicio: int = None, ano_fim: int = None) -> dict:
+
+def _meses_a_coletar(meses: List[Tuple[int, int]], coletados: Dict[Tuple[int, int], Optional[str]]
+                     ) -> List[Tuple[int, int]]:
+    """Coleta incremental: o mês corrente e o anterior do mesmo ano (a folha ainda pode ser
+    lançada ou corrigida) mais qualquer mês do período que ainda não foi coletado. Meses
+    fechados e já no banco não mudam no portal e não são baixados de novo.
+
+    Em janeiro, o dezembro anterior não volta automaticamente: ele é de outro exercício, e
+    trocar o exercício é o bug do portal descrito em scrape_remuneracao. Para rebaixá-lo,
+    rodar de propósito com --ano-inicio/--ano-fim no ano anterior."""
+    hoje = date.today()
+    recentes = {(hoje.year, hoje.month), (hoje.year, hoje.month - 1)}
+    return [m for m in meses if m in recentes or m not in coletados]
+
+
+def scrape_remuneracao(ano_inicio: int = None, ano_fim: int = None, run_id: Optional[int] = None,
+                       workers: int = 1, completo: bool = False) -> dict:
+    """Coleta o CSV de remuneração de cada mês do período e grava os vereadores (CORPO
+    LEGISLATIVO).
+
+    Os meses viram uma fila de jobs consumida por `workers` threads, cada uma com o seu
+    navegador e um contexto novo por mês (ver _coletar_mes) - um backfill de vários anos
+    escala com o número de workers sem abrir mão do isolamento entre meses. O parse e a
+    gravação ficam nesta thread, conforme os meses chegam (um único escritor no banco).
+
+    Por padrão a coleta é incremental (ver _meses_a_coletar); `completo=True` baixa todos os
+    meses do período. Mesmo assim, um mês cujo CSV tem o mesmo sha256 da última coleta
+    (tabela remuneracao_meses) não é parseado nem regravado.
+
+    Com `run_id`, cada mês gravado entra no checkpoint "remuneracao" da execução e, ao
+    retomar, os meses já gravados são pulados (a etapa só conclui se nenhum mês falhar)."""
     # Default = só o ano corrente. Trocar de "Exercício" pra um ano anterior é um bug
     # confirmado do portal (ver ROADMAP.md) - só tentar um ano_inicio anterior de propósito,
     # nunca como comportamento automático do pipeline diário.
     ano_inicio = ano_inicio or date.today().year
     ano_fim = ano_fim or date.today().year
 
-    total = 0
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page(ignore_https_errors=True, accept_downloads=True)
-
-        for ano in range(ano_inicio, ano_fim + 1):
-            ultimo_mes = 12
-            if ano == date.today().year:
-                ultimo_mes = date.today().month
-
-            for indice_mes in range(1, ultimo_mes + 1):
-                try:
-                    # Renavegar do zero a cada mês (em vez de reaproveitar a página) -
-                    # mais lento, mas evidenciou-se muito mais confiável: reaproveitar
-                    # o estado entre pesquisas sucessivas corrompia o botão de exportar
-                    # em meses seguintes. Ver ROADMAP.md.
-                    _navegar_para_servidores(page)
-                    if ano != date.today().year:
-                        try:
-                            _selecionar_exercicio(page, ano)
-                        except Exception as e:
-                            logger.warning(f"Não foi possível trocar para o exercício {ano} ({e}); pulando esse ano")
-                            break
-
-                    fr = _pesquisar_mes(page, indice_mes)
-                    conteudo = _exportar_csv(page, fr)
-                    registros = _parse_csv(conteudo, ano, indice_mes)
-                    for registro in registros:
-                        db_manager.upsert_remuneracao(registro)
-                    total += len(registros)
-                    logger.info(f"{ano}-{indice_mes:02d}: {len(registros)} registros ({UNIDADE_ALVO})")
-                except Exception as e:
-                    logger.warning(f"Falha ao coletar remuneração de {ano}-{indice_mes:02d}: {e}")
-
-        browser.close()
+    checkpoint = db_manager.checkpoint(run_id, "remuneracao") if run_id else None
+    meses_concluidos = set(checkpoint.progresso.get("meses", [])) if checkpoint else set()
+    if meses_concluidos:
+        logger.info(f"Retomando remuneração: {len(meses_concluidos)} meses já gravados nesta execução")
+
+    coletados = db_manager.meses_remuneracao()
+    periodo = _meses_do_periodo(ano_inicio, ano_fim)
+    meses = periodo if completo else _meses_a_coletar(periodo, coletados)
+    if len(meses) < len(periodo):
+        logger.info(f"Coleta incremental: {len(periodo) - len(meses)} meses fechados já no banco serão pulados")
+
+    jobs: "queue.Queue[Tuple[int, int]]" = queue.Queue()
+    pendentes = [(ano, mes) for ano, mes in meses if f"{ano}-{mes:02d}" not in meses_concluidos]
+    for job in pendentes:
+        jobs.put(job)
+    workers = max(1, min(workers, len(pendentes)))
+    logger.info(f"{len(pendentes)} meses a coletar com {workers} navegador(es) em paralelo")
+
+    resultados: queue.Queue = queue.Queue()
+    threads = [threading.Thread(target=_worker_navegador, args=(jobs, resultados), name=f"navegador-{i}",
+                                daemon=True)
+               for i in range(workers)] if pendentes else []
+    for thread in threads:
+        thread.start()
 
+    total = 0
+    recebidos = 0
+    falhas = 0
+    meses_ok = 0
+    inalterados = 0
+    tempos_totais: Dict[str, List[float]] = {}  # durações de cada passo, para achar o gargalo
+    ativos = len(threads)
+    while ativos:
+        resultado = resultados.get()
+        if resultado is _WORKER_FIM:
+            ativos -= 1
+            continue
+        recebidos += 1
+        ano, mes, conteudo, tempos, erro = resultado
+        chave_mes = f"{ano}-{mes:02d}"
+        for passo, duracao in tempos.items():
+            tempos_totais.setdefault(passo, []).append(duracao)
+        logger.debug(f"{chave_mes}: " + ", ".join(f"{passo} {duracao:.1f}s" for passo, duracao in tempos.items()))
+        try:
+            if erro:
+                raise erro
+            metricas.somar("bytes_baixados", len(conteudo))
+            csv_hash = hashlib.sha256(conteudo).hexdigest()
+            # o CSV é parseado em fluxo dentro do upsert, então parse e gravação contam juntos
+            with metricas.medir("tempo_gravacao_s"), db_manager.get_connection():
+                if coletados.get((ano, mes)) == csv_hash:
+                    inalterados += 1
+                    logger.info(f"{chave_mes}: CSV igual ao da última coleta, nada a gravar")
+                else:
+                    registros = db_manager.upsert_remuneracoes(_iterar_csv(io.BytesIO(conteudo), ano, mes))
+                    db_manager.registrar_mes_remuneracao(ano, mes, csv_hash, registros)
+                    total += registros
+                    metricas.somar("linhas_gravadas", registros)
+                    logger.info(f"{chave_mes}: {registros} registros ({UNIDADE_ALVO})")
+                if run_id:
+                    meses_concluidos.add(chave_mes)
+                    db_manager.salvar_checkpoint(run_id, "remuneracao", {"meses": sorted(meses_concluidos)})
+            meses_ok += 1
+        except Exception as e:
+            falhas += 1
+            logger.warning(f"Falha ao coletar remuneração de {chave_mes}: {e}")
+
+    for thread in threads:
+        thread.join()
+    nao_coletados = len(pendentes) - recebidos  # sobraram na fila porque os navegadores caíram
+    if nao_coletados:
+        falhas += nao_coletados
+        logger.warning(f"{nao_coletados} meses não foram coletados (navegadores encerrados com erro)")
+
+    if run_id and not falhas:
+        db_manager.salvar_checkpoint(run_id, "remuneracao", {"meses": sorted(meses_concluidos)}, concluida=True)
+    if tempos_totais:
+        logger.info("Tempo médio por passo: " + ", ".join(
+            f"{passo} {sum(duracoes) / len(duracoes):.1f}s (máx {max(duracoes):.1f}s)"
+            for passo, duracoes in tempos_totais.items()
+        ))
     logger.info(f"Total de registros de remuneração coletados: {total}")
-    return {"total_registros": total}
+    return {"total_registros": total, "meses_coletados": meses_ok, "meses_inalterados": inalterados,
+            "meses_com_falha": falhas}
 
 
 if __name__ == "__main__":
     from .utils import setup_logging
+
+    parser = argparse.ArgumentParser(description="Remuneração dos vereadores (portal de transparência)")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retoma a última coleta de remuneração que não terminou, pulando os meses já gravados",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Baixa todos os meses do período, não só o corrente, o anterior e os que faltam no banco",
+    )
+    parser.add_argument("--ano-inicio", type=int, help="Primeiro ano do período (default: ano corrente)")
+    parser.add_argument("--ano-fim", type=int, help="Último ano do período (default: ano corrente)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Navegadores em paralelo, cada um com um contexto isolado por mês (útil em backfill de vários anos)",
+    )
+    args = parser.parse_args()
+
     setup_logging()
-    scrape_remuneracao()
+    db_manager.create_tables()
+    run_id, retomada = db_manager.iniciar_execucao("remuneracao", retomar=args.resume)
+    if retomada:
+        logger.info(f"Retomando a execução #{run_id}")
+    status = "falhou"
+    try:
+        with metricas.etapa("remuneracao"):
+            scrape_remuneracao(args.ano_inicio, args.ano_fim, run_id=run_id, workers=args.workers,
+                               completo=args.full)
+        checkpoint = db_manager.checkpoint(run_id, "remuneracao")
+        status = "concluido" if checkpoint and checkpoint.concluida else "incompleto"
+    except KeyboardInterrupt:
+        status = "interrompido"
+        raise
+    finally:
+        db_manager.finalizar_execucao(run_id, status)
+        salvar_metricas(run_id, "remuneracao", status)
+        db_manager.close()
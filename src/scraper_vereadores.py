@@ -1,10 +1,15 @@
+import asyncio
+import hashlib
+import json
 import logging
 import re
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from urllib.parse import urljoin
 
 from .config import config
 from .database import ComissaoInfo, LegislaturaInfo, VereadorInfo, db_manager
+from .fetch_async import AsyncFetcher
+from .metrics import metricas
 from .utils import clean_text, extract_id_from_href, fetch_soup, parse_periodo_br
 
 logger = logging.getLogger(__name__)
@@ -80,7 +85,11 @@ def fetch_perfil_vereador(site_id: int) -> Optional[VereadorInfo]:
     if not soup:
         logger.error(f"Não foi possível acessar o perfil do vereador site_id={site_id}")
         return None
+    return parse_perfil_vereador(soup, site_id)
 
+
+def parse_perfil_vereador(soup, site_id: int) -> Optional[VereadorInfo]:
+    """Monta o perfil completo a partir do HTML de /Vereadores/Details?id=X."""
     titulo = soup.find("h1", class_="titulo-vereador")
     if not titulo:
         logger.error(f"Página de perfil sem título esperado: site_id={site_id}")
@@ -163,29 +172,137 @@ def extrair_comissoes(soup) -> List[ComissaoInfo]:
     return resultado
 
 
-def scrape_vereadores() -> int:
-    """Coleta a listagem atual + perfil completo de cada vereador e persiste no banco.
-    Retorna a quantidade de vereadores processados."""
-    basicos = list_vereadores_basico()
+# Muda quando a extração do perfil muda, para que todos os perfis sejam regravados uma vez
+_VERSAO_IMPRESSAO = "1"
+
+
+def impressao_perfil(soup, item: dict) -> str:
+    """sha256 dos trechos da página de perfil que parse_perfil_vereador/extrair_* leem
+    (título, itens "Label: valor", cards com título, seções de timeline, foto, e-mail) mais
+    os dados da listagem que complementam o perfil. Menu, rodapé, tokens etc. ficam de fora,
+    então só uma mudança no que seria gravado altera a impressão."""
+    partes = [_VERSAO_IMPRESSAO, json.dumps(item, sort_keys=True, ensure_ascii=False)]
+    partes.extend(str(tag) for tag in soup.find_all("h1", class_="titulo-vereador"))
+    partes.extend(str(li) for li in soup.find_all("li") if li.find("strong"))
+    partes.extend(str(h5.find_parent("div", class_="card-body") or h5)
+                  for h5 in soup.find_all("h5", class_="card-title"))
+    partes.extend(str(bloco) for bloco in soup.find_all("div", class_="mt-5"))
+    partes.extend(str(img) for img in soup.find_all("img", src=re.compile(r"handler=Imagem\b")))
+    partes.extend(_EMAIL_RE.findall(soup.get_text()))
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+# (site_id, situação, perfil, legislaturas, comissões, impressão); situação é "novo",
+# "atualizado" ou "inalterado" - neste último caso o perfil não é parseado e perfil,
+# legislaturas e comissões são None
+PerfilColetado = Tuple[int, str, Optional[VereadorInfo], Optional[List[LegislaturaInfo]],
+                       Optional[List[ComissaoInfo]], str]
+
+
+def _montar_perfil(soup, item: dict, hash_anterior: Optional[str], ja_gravado: bool) -> Optional[PerfilColetado]:
+    """Parse completo de um perfil (dados, legislaturas, comissões) - roda nos workers.
+    Se a impressão da página for igual à gravada, devolve "inalterado" sem parsear."""
+    impressao = impressao_perfil(soup, item)
+    if impressao == hash_anterior:
+        return item["site_id"], "inalterado", None, None, None, impressao
+
+    resultado = parse_perfil_vereador(soup, item["site_id"])
+    if not resultado:
+        return None
+    perfil, soup = resultado
+
+    # A listagem tem partido/foto/licenciado já prontos; o perfil pode preencher lacunas
+    perfil.partido = perfil.partido or item["partido"]
+    perfil.foto_url = perfil.foto_url or item["foto_url"]
+    perfil.licenciado = perfil.licenciado or item["licenciado"]
+    situacao = "atualizado" if ja_gravado else "novo"
+    return item["site_id"], situacao, perfil, extrair_legislaturas(soup), extrair_comissoes(soup), impressao
 
-    processados = 0
-    for item in basicos:
-        resultado = fetch_perfil_vereador(item["site_id"])
+
+async def _coletar_perfil(fetcher: AsyncFetcher, item: dict,
+                          hashes: Dict[int, Optional[str]]) -> Optional[PerfilColetado]:
+    site_id = item["site_id"]
+    soup = await fetcher.fetch_soup(config.scraping.vereador_details_url, params={"id": site_id})
+    if not soup:
+        logger.error(f"Não foi possível acessar o perfil do vereador site_id={site_id}")
+        return None
+
+    def _montar():
+        with metricas.medir("tempo_parse_s"):
+            return _montar_perfil(soup, item, hashes.get(site_id), site_id in hashes)
+
+    return await asyncio.to_thread(_montar)
+
+
+def _gravar_perfil(perfil: VereadorInfo, legislaturas: List[LegislaturaInfo], comissoes: List[ComissaoInfo],
+                   impressao: str):
+    with db_manager.get_connection():
+        vereador_id = db_manager.upsert_vereador(perfil, perfil_hash=impressao)
+        db_manager.replace_legislaturas(vereador_id, legislaturas)
+        db_manager.replace_comissoes(vereador_id, comissoes)
+
+
+async def _coletar_perfis(basicos: List[dict], hashes: Dict[int, Optional[str]],
+                          run_id: Optional[int], concluidos: Set[int]) -> Dict[str, int]:
+    """Busca e parseia até `profile_workers` perfis ao mesmo tempo; a gravação fica aqui, no
+    event loop, um perfil por vez e na ordem em que ficam prontos (um único escritor no banco).
+    Com `run_id`, cada perfil terminado entra em `concluidos` e no checkpoint "vereadores"."""
+    fetcher = AsyncFetcher(max_concurrency=config.scraping.profile_workers)
+    contagem = {"novos": 0, "atualizados": 0, "inalterados": 0, "falhas": 0}
+    tarefas = [_coletar_perfil(fetcher, item, hashes) for item in basicos]
+    for tarefa in asyncio.as_completed(tarefas):
+        resultado = await tarefa
         if not resultado:
+            contagem["falhas"] += 1
             continue
-        perfil, soup = resultado
+        site_id, situacao, perfil, legislaturas, comissoes, impressao = resultado
+        with db_manager.get_connection():
+            if situacao == "inalterado":
+                contagem["inalterados"] += 1
+            else:
+                with metricas.medir("tempo_gravacao_s"):
+                    _gravar_perfil(perfil, legislaturas, comissoes, impressao)
+                contagem["novos" if situacao == "novo" else "atualizados"] += 1
+                logger.info(f"Perfil {situacao}: {perfil.nome} (site_id={perfil.site_id})")
+            if run_id:
+                concluidos.add(site_id)
+                db_manager.salvar_checkpoint(run_id, "vereadores", {"site_ids": sorted(concluidos)})
+    return contagem
+
+
+def scrape_vereadores(run_id: Optional[int] = None) -> Dict[str, int]:
+    """Coleta a listagem atual + perfil completo de cada vereador e persiste no banco.
 
-        # A listagem tem partido/foto/licenciado já prontos; o perfil pode preencher lacunas
-        perfil.partido = perfil.partido or item["partido"]
-        perfil.foto_url = perfil.foto_url or item["foto_url"]
-        perfil.licenciado = perfil.licenciado or item["licenciado"]
+    Os perfis são buscados e parseados por um pool de `config.scraping.profile_workers`
+    (respeitando o mesmo rate limit por host do resto da coleta), então a etapa leva
+    aproximadamente (perfis / workers) latências em vez da soma de todas.
 
-        vereador_id = db_manager.upsert_vereador(perfil)
-        db_manager.replace_legislaturas(vereador_id, extrair_legislaturas(soup))
-        db_manager.replace_comissoes(vereador_id, extrair_comissoes(soup))
+    Perfis cuja página tem a mesma impressão digital (impressao_perfil) da última gravação
+    não são parseados nem regravados. Retorna a contagem de perfis novos, atualizados,
+    inalterados e que falharam, mais o total processado.
 
-        processados += 1
-        logger.info(f"Perfil processado: {perfil.nome} (site_id={perfil.site_id})")
+    Com `run_id`, os site_ids terminados ficam no checkpoint "vereadores" da execução; ao
+    retomar, esses perfis nem são buscados de novo. A etapa só é marcada como concluída se
+    nenhum perfil falhar."""
+    basicos = list_vereadores_basico()
 
-    logger.info(f"Total de vereadores processados: {processados}/{len(basicos)}")
-    return processados
+    checkpoint = db_manager.checkpoint(run_id, "vereadores") if run_id else None
+    concluidos = set(checkpoint.progresso.get("site_ids", [])) if checkpoint else set()
+    pendentes = [item for item in basicos if item["site_id"] not in concluidos]
+    if concluidos:
+        logger.info(f"Retomando vereadores: {len(basicos) - len(pendentes)} perfis já concluídos nesta execução")
+
+    contagem = asyncio.run(_coletar_perfis(pendentes, db_manager.hashes_perfis(), run_id, concluidos))
+    contagem["total"] = contagem["novos"] + contagem["atualizados"] + contagem["inalterados"]
+    metricas.somar("linhas_novas", contagem["novos"])
+    metricas.somar("linhas_atualizadas", contagem["atualizados"])
+    metricas.somar("linhas_inalteradas", contagem["inalterados"])
+    if run_id and not contagem["falhas"]:
+        db_manager.salvar_checkpoint(run_id, "vereadores", {"site_ids": sorted(concluidos)}, concluida=True)
+
+    logger.info(
+        f"Total de vereadores processados: {contagem['total']}/{len(basicos)} "
+        f"({contagem['novos']} novos, {contagem['atualizados']} atualizados, "
+        f"{contagem['inalterados']} inalterados)"
+    )
+    return contagem
@@ -1,19 +1,32 @@
+import json
 import logging
+import random
 import re
 import sys
+import threading
 import time
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from requests.adapters import HTTPAdapter
 
 from .config import config
+from .fixtures import gravar_fixture
+from .http_cache import get_cache
+from .metrics import metricas
 
 logger = logging.getLogger(__name__)
 
-_last_request_time = 0.0
+T = TypeVar("T")
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
 
 
 def setup_logging(level: int = logging.INFO):
@@ -43,56 +56,325 @@ def setup_logging(level: int = logging.INFO):
     logging.info(f"Logging configurado. Arquivo: {log_file}")
 
 
-def _wait_for_rate_limit():
-    global _last_request_time
-    elapsed = time.time() - _last_request_time
-    delay = config.scraping.request_delay
-    if elapsed < delay:
-        time.sleep(delay - elapsed)
-    _last_request_time = time.time()
+def get_session() -> requests.Session:
+    """Sessão HTTP compartilhada por todos os scrapers (keep-alive + pool de conexões).
+
+    Reaproveitar a mesma conexão TCP/TLS entre as páginas do Siscam e os perfis de
+    /Vereadores/Details evita um handshake novo a cada GET."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            cfg = config.scraping
+            session = requests.Session()
+            session.headers.update(cfg.headers)
+            adapter = HTTPAdapter(pool_connections=cfg.pool_connections, pool_maxsize=cfg.pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def estatisticas_conexoes() -> Dict[str, int]:
+    """Contadores da execução atual: requisições feitas, conexões novas (handshake) e
+    conexões reaproveitadas do pool (keep-alive)."""
+    requisicoes = novas = 0
+    if _session is not None:
+        # o mesmo adapter é montado em http:// e https:// - contar cada um só uma vez
+        for adapter in {id(a): a for a in _session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for chave in pools.keys():
+                pool = pools[chave]
+                requisicoes += pool.num_requests
+                novas += pool.num_connections
+    return {
+        "requisicoes": requisicoes,
+        "conexoes_novas": novas,
+        "conexoes_reaproveitadas": max(requisicoes - novas, 0),
+    }
+
+
+class TokenBucket:
+    """Token bucket thread-safe: libera `rate` requisições/s, acumulando até `capacity`.
+
+    `reservar()` consome uma ficha e devolve quanto tempo esperar antes de usá-la, sem
+    dormir - assim o mesmo balde serve ao caminho síncrono (time.sleep) e ao assíncrono
+    (asyncio.sleep) sem que um bloqueie o outro."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()  # pode ficar no futuro durante uma pausa (ver pausar)
+        self._lock = threading.Lock()
+
+    def _reabastecer(self, agora: float):
+        if agora > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (agora - self._updated) * self.rate)
+            self._updated = agora
+
+    def reservar(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            agora = time.monotonic()
+            self._reabastecer(agora)
+            self._tokens -= 1
+            pausa = max(self._updated - agora, 0.0)
+            return pausa + (0.0 if self._tokens >= 0 else -self._tokens / self.rate)
+
+    def definir_taxa(self, rate: float):
+        with self._lock:
+            self._reabastecer(time.monotonic())  # fichas acumuladas até agora valem pela taxa antiga
+            self.rate = rate
+
+    def pausar(self, segundos: float):
+        """Nenhuma ficha nova nos próximos `segundos` (ex.: Retry-After); as requisições que
+        reservarem nesse meio-tempo saem espaçadas pela taxa a partir do fim da pausa."""
+        with self._lock:
+            agora = time.monotonic()
+            self._reabastecer(agora)
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = max(self._updated, agora + segundos)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_do_host(url: str) -> TokenBucket:
+    """Token bucket do host de `url` - o orçamento de requests_per_second vale por host,
+    somando todas as requisições em voo (síncronas e assíncronas)."""
+    host = urlsplit(url).netloc
+    with _buckets_lock:
+        if host not in _buckets:
+            cfg = config.scraping
+            _buckets[host] = TokenBucket(cfg.requests_per_second, cfg.burst)
+        return _buckets[host]
+
+
+class TaxaAdaptativa:
+    """Controle AIMD da taxa de um host, aplicado ao token bucket dele.
+
+    Cada resposta rápida (até `healthy_latency`) e sem erro soma `rate_increase_step` à taxa,
+    até `max_requests_per_second`; 429/5xx e timeouts/quedas de conexão a multiplicam por
+    `rate_decrease_factor`, até `min_requests_per_second`. Um Retry-After pausa o host
+    inteiro pelo tempo pedido. Respostas lentas mas corretas só seguram a taxa onde está."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._lock = threading.Lock()
+
+    def _ajustar(self, nova_taxa: float):
+        cfg = config.scraping
+        nova_taxa = min(max(nova_taxa, cfg.min_requests_per_second), cfg.max_requests_per_second)
+        self.bucket.definir_taxa(nova_taxa)
+
+    def sucesso(self, latencia: float):
+        cfg = config.scraping
+        if not cfg.adaptive_rate or latencia > cfg.healthy_latency:
+            return
+        with self._lock:
+            self._ajustar(self.bucket.rate + cfg.rate_increase_step)
+
+    def sobrecarga(self, retry_after: Optional[float] = None):
+        cfg = config.scraping
+        if retry_after:
+            self.bucket.pausar(retry_after)
+        if not cfg.adaptive_rate:
+            return
+        with self._lock:
+            anterior = self.bucket.rate
+            self._ajustar(anterior * cfg.rate_decrease_factor)
+            logger.info(f"Sinal de sobrecarga do servidor: taxa {anterior:.2f} -> {self.bucket.rate:.2f} req/s"
+                        + (f", pausa de {retry_after:.1f}s (Retry-After)" if retry_after else ""))
+
+    def registrar(self, response: requests.Response, latencia: float):
+        status = response.status_code
+        if status == 429 or status >= 500:
+            self.sobrecarga(retry_after_segundos(response))
+        elif status < 400:
+            self.sucesso(latencia)
+
+
+_controles: Dict[str, TaxaAdaptativa] = {}
+
+
+def controle_do_host(url: str) -> TaxaAdaptativa:
+    bucket = bucket_do_host(url)
+    host = urlsplit(url).netloc
+    with _buckets_lock:
+        if host not in _controles:
+            _controles[host] = TaxaAdaptativa(bucket)
+        return _controles[host]
+
+
+def taxas_por_host() -> Dict[str, float]:
+    """Taxa atual (req/s) de cada host - depois de uma execução, o quanto o controle adaptativo
+    subiu ou baixou a partir de `requests_per_second`."""
+    with _buckets_lock:
+        return {host: bucket.rate for host, bucket in _buckets.items()}
+
+
+def _wait_for_rate_limit(url: str):
+    espera = bucket_do_host(url).reservar()
+    if espera > 0:
+        time.sleep(espera)
+
+
+def retry_after_segundos(response: Optional[requests.Response]) -> Optional[float]:
+    """Valor do header Retry-After em segundos (aceita segundos ou data HTTP)."""
+    valor = response.headers.get("Retry-After") if response is not None else None
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        quando = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if quando.tzinfo is None:
+        quando = quando.replace(tzinfo=timezone.utc)
+    return max((quando - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+# 4xx que valem nova tentativa; os demais (404, 403, 400...) não mudam repetindo o GET
+_STATUS_4XX_RETENTAVEIS = {408, 425, 429}
+
+
+def _erro_retentavel(erro: Exception) -> bool:
+    """Erros de rede, timeouts, 5xx, 408/425/429 e corpo inválido (ValueError) são retentados."""
+    response = getattr(erro, "response", None)
+    if response is None:
+        return True
+    return response.status_code >= 500 or response.status_code in _STATUS_4XX_RETENTAVEIS
 
 
-def fetch_soup(url: str, params: Optional[dict] = None) -> Optional[BeautifulSoup]:
-    """GET com rate limiting simples + retry com backoff exponencial."""
+def _tempo_espera_retry(attempt: int, erro: Optional[Exception] = None) -> float:
+    """Backoff exponencial (`retry_delay` * 2^attempt, até `max_retry_delay`) com jitter -
+    entre metade e o valor cheio, para que requisições que falharam juntas não voltem
+    juntas - e nunca menos que o Retry-After do servidor."""
     cfg = config.scraping
+    teto = min(cfg.retry_delay * (2 ** attempt), cfg.max_retry_delay)
+    espera = random.uniform(teto / 2, teto)
+    retry_after = retry_after_segundos(getattr(erro, "response", None))
+    return max(espera, retry_after or 0.0)
 
-    for attempt in range(cfg.max_retries + 1):
-        _wait_for_rate_limit()
-        try:
-            logger.debug(f"GET {url} params={params} (tentativa {attempt + 1})")
-            response = requests.get(url, params=params, headers=cfg.headers, timeout=30)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
-        except requests.RequestException as e:
-            logger.warning(f"Erro ao acessar {url} (tentativa {attempt + 1}): {e}")
-            if attempt < cfg.max_retries:
-                wait_time = cfg.retry_delay * (2 ** attempt)
-                time.sleep(wait_time)
 
-    logger.error(f"Falha definitiva ao acessar {url} após {cfg.max_retries + 1} tentativas")
+def _cache_fresco(url: str, params: Optional[dict]) -> Optional[str]:
+    """Corpo de uma entrada do cache em disco que ainda vale sem ir à rede (ver http_cache)."""
+    cache = get_cache()
+    if cache is None:
+        return None
+    entrada = cache.buscar(url, params)
+    if entrada and cache.fresca(entrada):
+        return cache.hit(entrada)
     return None
 
 
-def fetch_json(url: str, params: Optional[dict] = None) -> Optional[dict]:
-    """GET com rate limiting/retry, retornando JSON decodificado."""
+def _parsear(parse: Callable[[str], T], texto: str) -> T:
+    with metricas.medir("tempo_parse_s"):
+        return parse(texto)
+
+
+def _tentativa(url: str, params: Optional[dict], parse: Callable[[str], T]) -> T:
+    """Uma única tentativa de GET (sem rate limiting nem retry) + conversão do corpo.
+    Se houver entrada no cache com ETag/Last-Modified, o GET é condicional."""
+    cfg = config.scraping
+    cache = get_cache()
+    anterior = cache.buscar(url, params) if cache else None
+    headers = anterior.headers_condicionais() if anterior else None
+
+    controle = controle_do_host(url)
+    inicio = time.monotonic()
+    try:
+        response = get_session().get(
+            url, params=params, headers=headers, timeout=(cfg.connect_timeout, cfg.read_timeout)
+        )
+    except (requests.ConnectionError, requests.Timeout):
+        controle.sobrecarga()
+        raise
+    controle.registrar(response, time.monotonic() - inicio)
+    metricas.somar("requisicoes")
+    metricas.somar("bytes_baixados", len(response.content))
+    if response.status_code == 304 and anterior:
+        return _parsear(parse, cache.hit(anterior, revalidado=True))
+    response.raise_for_status()
+    if cfg.fixtures_record_dir:
+        gravar_fixture(cfg.fixtures_record_dir, url, params, response.content, response.headers.get("Content-Type"))
+    texto = cache.salvar(url, params, response, anterior) if cache else response.text
+    return _parsear(parse, texto)
+
+
+def _fetch(url: str, params: Optional[dict], parse: Callable[[str], T]) -> Optional[T]:
     cfg = config.scraping
 
+    texto = _cache_fresco(url, params)
+    if texto is not None:
+        return _parsear(parse, texto)
+
     for attempt in range(cfg.max_retries + 1):
-        _wait_for_rate_limit()
+        _wait_for_rate_limit(url)
         try:
-            logger.debug(f"GET (json) {url} params={params} (tentativa {attempt + 1})")
-            response = requests.get(url, params=params, headers=cfg.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            logger.debug(f"GET {url} params={params} (tentativa {attempt + 1})")
+            return _tentativa(url, params, parse)
+        except (requests.RequestException, ValueError) as e:
+            if not _erro_retentavel(e):
+                logger.error(f"Erro permanente ao acessar {url}, sem nova tentativa: {e}")
+                metricas.somar("falhas_http")
+                return None
             logger.warning(f"Erro ao acessar {url} (tentativa {attempt + 1}): {e}")
             if attempt < cfg.max_retries:
-                time.sleep(cfg.retry_delay * (2 ** attempt))
+                metricas.somar("retries")
+                time.sleep(_tempo_espera_retry(attempt, e))
 
+    metricas.somar("falhas_http")
     logger.error(f"Falha definitiva ao acessar {url} após {cfg.max_retries + 1} tentativas")
     return None
 
 
+_backends_indisponiveis = set()
+
+
+def make_soup(texto: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Monta o BeautifulSoup com o backend de `config.scraping.html_parser`.
+
+    `parse_only` (SoupStrainer) materializa só os nós de interesse - ex.: os
+    div.data-list-item de uma página de resultados, sem o resto do layout do site. Se o
+    backend configurado não estiver instalado (lxml é opcional), usa o html.parser da
+    stdlib e avisa uma única vez."""
+    backend = config.scraping.html_parser
+    if backend not in _backends_indisponiveis:
+        try:
+            return BeautifulSoup(texto, backend, parse_only=parse_only)
+        except FeatureNotFound:
+            _backends_indisponiveis.add(backend)
+            logger.warning(f"Parser HTML '{backend}' não instalado, usando html.parser")
+    return BeautifulSoup(texto, "html.parser", parse_only=parse_only)
+
+
+def _parse_json(texto: str) -> dict:
+    return json.loads(texto)
+
+
+def fetch_soup(url: str, params: Optional[dict] = None,
+               parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+    """GET com rate limiting adaptativo por host + retry com backoff exponencial (só para
+    erros transitórios - um 404, por exemplo, devolve None na hora)."""
+    return _fetch(url, params, partial(make_soup, parse_only=parse_only))
+
+
+def fetch_text(url: str, params: Optional[dict] = None) -> Optional[str]:
+    """GET com rate limiting/retry, retornando o corpo sem parsear (para quem parseia em outra
+    etapa - ver pipeline.py)."""
+    return _fetch(url, params, str)
+
+
+def fetch_json(url: str, params: Optional[dict] = None) -> Optional[dict]:
+    """GET com rate limiting/retry, retornando JSON decodificado."""
+    return _fetch(url, params, _parse_json)
+
+
 def clean_text(text: Optional[str]) -> str:
     if not text:
         return ""
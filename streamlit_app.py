@@ -5,13 +5,15 @@ produção legislativa por vereador, tipo de proposta e situação.
 """
 
 import sqlite3
+from contextlib import closing
 from pathlib import Path
 
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from src.config import FAMILIA_POR_TIPO, config
+from src.classificacao import classificacoes_com_salvas
+from src.config import config
 
 # --------------------------------------------------------------------------- #
 # Paleta (fixa, validada para acessibilidade - ver skill de dataviz do projeto)
@@ -52,19 +54,6 @@ COLUNAS_PROPOSITURA_LABELS = {
 }
 
 
-def status_de_situacao(situacao: str) -> str:
-    s = (situacao or "").upper()
-    if any(k in s for k in ["APROVADO", "DEFERIDO", "CONVERTIDO", "TRANSFORMADO"]):
-        return "Aprovado"
-    if any(k in s for k in ["REJEITADO", "INDEFERIDO", "PREJUDICADO"]):
-        return "Rejeitado"
-    if any(k in s for k in ["TRAMITANDO", "ENCAMINHA", "APRESENTADO"]):
-        return "Em tramitação"
-    if any(k in s for k in ["ARQUIVADO", "RETIRADO", "ADIADO", "REVOGADA"]):
-        return "Arquivado/Retirado"
-    return "Outra situação"
-
-
 def tabela_proposituras(df: pd.DataFrame, colunas=None):
     """Renderiza uma tabela de proposituras com colunas em português, data formatada
     e o link do documento como botão clicável (em vez de colunas cruas do banco)."""
@@ -97,22 +86,36 @@ def carregar_dados():
     if not Path(config.db_path).exists():
         return None
 
-    conn = sqlite3.connect(config.db_path)
-    proposituras = pd.read_sql_query("SELECT * FROM proposituras", conn)
-    vereadores = pd.read_sql_query("SELECT * FROM vereadores", conn)
-    autores = pd.read_sql_query(
-        """
-        SELECT pa.propositura_id, v.id as vereador_id, v.nome as vereador_nome,
-               v.apelido, v.partido
-        FROM propositura_autores pa
-        JOIN vereadores v ON v.id = pa.vereador_id
-        """,
-        conn,
-    )
-    legislaturas = pd.read_sql_query("SELECT * FROM legislaturas", conn)
-    comissoes = pd.read_sql_query("SELECT * FROM comissoes", conn)
-    ultima_atualizacao = conn.execute("SELECT MAX(updated_at) FROM proposituras").fetchone()[0]
-    conn.close()
+    # conexão própria e somente leitura: o dashboard não grava nada, então não deve passar
+    # pelos PRAGMAs de escrita nem pela conexão persistente por thread do db_manager
+    uri = f"{Path(config.db_path).resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as conn:
+        proposituras = pd.read_sql_query("SELECT * FROM proposituras", conn)
+        vereadores = pd.read_sql_query("SELECT * FROM vereadores", conn)
+        autores = pd.read_sql_query(
+            """
+            SELECT pa.propositura_id, v.id as vereador_id, v.nome as vereador_nome,
+                   v.apelido, v.partido
+            FROM propositura_autores pa
+            JOIN vereadores v ON v.id = pa.vereador_id
+            """,
+            conn,
+        )
+        legislaturas = pd.read_sql_query("SELECT * FROM legislaturas", conn)
+        comissoes = pd.read_sql_query("SELECT * FROM comissoes", conn)
+        # classificação já materializada por export_json/gerar_resumos (bancos antigos podem
+        # ainda não ter a tabela - aí tudo é classificado aqui, sem gravar)
+        tem_classificacoes = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'proposituras_classificacao'"
+        ).fetchone()
+        colunas_classificacao = ["propositura_id", "entrada_hash", "versao_regras", "familia", "status", "categoria"]
+        if tem_classificacoes:
+            classificacoes = pd.read_sql_query(
+                f"SELECT {', '.join(colunas_classificacao)} FROM proposituras_classificacao", conn
+            )
+        else:
+            classificacoes = pd.DataFrame(columns=colunas_classificacao)
+        ultima_atualizacao = conn.execute("SELECT MAX(updated_at) FROM proposituras").fetchone()[0]
 
     legislaturas["data_inicio"] = pd.to_datetime(legislaturas["data_inicio"])
     legislaturas["data_fim"] = pd.to_datetime(legislaturas["data_fim"])
@@ -125,9 +128,8 @@ def carregar_dados():
 
     proposituras["data"] = pd.to_datetime(proposituras["data"])
     proposituras = proposituras[proposituras["data"] >= legislatura_atual_inicio].copy()
-    proposituras["familia"] = proposituras["tipo"].map(FAMILIA_POR_TIPO).fillna("Outros")
+    proposituras[["familia", "status", "categoria"]] = classificacoes_com_salvas(proposituras, classificacoes)
     proposituras["familia_label"] = proposituras["familia"].map(FAMILIA_LABEL)
-    proposituras["status"] = proposituras["situacao"].apply(status_de_situacao)
 
     return {
         "proposituras": proposituras,